@@ -3,9 +3,10 @@ Calculation engine with dependency tracking and cycle detection.
 Handles formula recalculation and dependency management.
 """
 from typing import Dict, Set, List, Tuple, Any, Optional
-from collections import defaultdict, deque
-from model import SpreadsheetModel, parse_address, parse_range
-from formula import parse_formula, FormulaEvaluator, ASTNode, CellRefNode, RangeNode, FunctionNode, BinaryOpNode, UnaryOpNode
+from collections import defaultdict
+from itertools import islice
+from model import SpreadsheetModel, Cell, parse_address, parse_range, next_change_stamp
+from formula import parse_formula, collect_refs, FormulaEvaluator, ASTNode
 
 
 class DependencyGraph:
@@ -72,53 +73,34 @@ class DependencyGraph:
         
         return dfs(start_cell) or []
     
-    def topological_sort(self, cells: Set[Tuple[int, int]]) -> List[Tuple[int, int]]:
-        """Return cells in topological order for recalculation"""
+    def topological_levels(self, cells: Set[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        """Group cells into levels; cells in a level depend only on earlier levels"""
         in_degree = defaultdict(int)
         
-        # Calculate in-degrees
         for cell in cells:
             for dep in self.dependencies[cell]:
                 if dep in cells:
                     in_degree[cell] += 1
         
-        # Start with cells that have no dependencies
-        queue = deque([cell for cell in cells if in_degree[cell] == 0])
-        result = []
+        level = [cell for cell in cells if in_degree[cell] == 0]
+        levels = []
         
-        while queue:
-            cell = queue.popleft()
-            result.append(cell)
-            
-            # Reduce in-degree for dependents
-            for dependent in self.dependents[cell]:
-                if dependent in cells:
-                    in_degree[dependent] -= 1
-                    if in_degree[dependent] == 0:
-                        queue.append(dependent)
+        while level:
+            levels.append(level)
+            next_level = []
+            for cell in level:
+                for dependent in self.dependents[cell]:
+                    if dependent in cells:
+                        in_degree[dependent] -= 1
+                        if in_degree[dependent] == 0:
+                            next_level.append(dependent)
+            level = next_level
         
-        return result
+        return levels
     
     def extract_dependencies_from_ast(self, ast: ASTNode) -> Set[Tuple[int, int]]:
         """Extract cell dependencies from AST"""
-        dependencies = set()
-        
-        def visit(node: ASTNode):
-            if isinstance(node, CellRefNode):
-                dependencies.add((node.row, node.col))
-            elif isinstance(node, RangeNode):
-                dependencies.update(node.cells)
-            elif isinstance(node, BinaryOpNode):
-                visit(node.left)
-                visit(node.right)
-            elif isinstance(node, UnaryOpNode):
-                visit(node.operand)
-            elif isinstance(node, FunctionNode):
-                for arg in node.args:
-                    visit(arg)
-        
-        visit(ast)
-        return dependencies
+        return set(collect_refs(ast))
 
 
 class CalculationEngine:
@@ -129,6 +111,12 @@ class CalculationEngine:
         self.dependency_graph = DependencyGraph()
         self.dirty_cells: Set[Tuple[int, int]] = set()
         self.calculating = False
+        
+        # Formula cells registered but not yet evaluated; shared with the model
+        # so display reads can evaluate them on demand
+        self._lazy_cells: Set[Tuple[int, int]] = set()
+        model.pending_cells = self._lazy_cells
+        model.resolve_pending = self.get_value_lazy
     
     def set_cell_formula(self, row: int, col: int, formula: str):
         """Set cell formula and update dependencies"""
@@ -136,35 +124,20 @@ class CalculationEngine:
         
         # Clear existing dependencies
         self.dependency_graph.clear_dependencies(cell_pos)
+        self._lazy_cells.discard(cell_pos)
+        if cell_pos in self.model.sheet.cells:
+            self.model.sheet.cells[cell_pos].reset_dependency_cache()
         
         if formula.startswith('='):
-            try:
-                # Parse formula and cache AST
-                ast = parse_formula(formula)
-                self.dependency_graph.ast_cache[cell_pos] = ast
-                
-                # Extract dependencies
-                dependencies = self.dependency_graph.extract_dependencies_from_ast(ast)
-                
-                # Add dependencies
-                for dep in dependencies:
-                    self.dependency_graph.add_dependency(cell_pos, dep)
-                
-                # Check for cycles
-                cycles = self.dependency_graph.find_cycles(cell_pos)
-                if cycles:
-                    # Mark all cells in cycle as having cycle error
-                    for cycle_cell in cycles:
-                        cell = self.model.sheet.get_cell(cycle_cell[0], cycle_cell[1])
-                        cell.error = "#CYCLE!"
-                        cell.value = "#CYCLE!"
-                    return
-                
-            except Exception as e:
-                # Formula parsing error
-                cell = self.model.sheet.get_cell(row, col)
-                cell.error = "#ERROR!"
-                cell.value = "#ERROR!"
+            if not self._register_formula(cell_pos, formula):
+                return
+            
+            # Check for cycles
+            cycles = self.dependency_graph.find_cycles(cell_pos)
+            if cycles:
+                # Mark all cells in cycle as having cycle error
+                for cycle_cell in cycles:
+                    self._set_cell_error(cycle_cell, "#CYCLE!")
                 return
         
         # Mark cell and dependents as dirty
@@ -174,6 +147,73 @@ class CalculationEngine:
         if not self.calculating:
             self.recalculate()
     
+    def _register_formula(self, cell_pos: Tuple[int, int], formula: str) -> bool:
+        """Parse a formula and record its dependencies; False on a parse error"""
+        try:
+            # Parse formula and cache AST
+            ast = parse_formula(formula)
+        except Exception:
+            # Formula parsing error
+            self._set_cell_error(cell_pos, "#ERROR!")
+            return False
+        
+        self.dependency_graph.ast_cache[cell_pos] = ast
+        for dep in self.dependency_graph.extract_dependencies_from_ast(ast):
+            self.dependency_graph.add_dependency(cell_pos, dep)
+        return True
+    
+    def _set_cell_error(self, cell_pos: Tuple[int, int], error: str):
+        cell = self.model.sheet.get_cell(cell_pos[0], cell_pos[1])
+        cell.error = error
+        cell.value = error
+    
+    def mark_all_dirty(self):
+        """Register every formula cell for on-demand evaluation instead of calculating now"""
+        self.dependency_graph = DependencyGraph()
+        self.dirty_cells.clear()
+        self._lazy_cells.clear()
+        
+        for cell_pos, cell in self.model.sheet.cells.items():
+            if cell.is_formula():
+                cell.reset_dependency_cache()
+                if self._register_formula(cell_pos, cell.raw):
+                    self._lazy_cells.add(cell_pos)
+    
+    def get_value_lazy(self, row: int, col: int) -> Any:
+        """Get a cell's value, first evaluating it and any pending precedents"""
+        lazy = self._lazy_cells
+        if (row, col) in lazy:
+            dependencies = self.dependency_graph.dependencies
+            
+            # Iterative post-order walk: precedents are evaluated before dependents.
+            # Reaching a cell again while it is still being expanded means a cycle
+            expanding = set()
+            stack = [((row, col), False)]
+            while stack:
+                cell_pos, done = stack.pop()
+                if done:
+                    expanding.discard(cell_pos)
+                    if cell_pos in lazy:
+                        lazy.discard(cell_pos)
+                        self._calculate_cell(cell_pos)
+                elif cell_pos in expanding:
+                    lazy.discard(cell_pos)
+                    self._set_cell_error(cell_pos, "#CYCLE!")
+                elif cell_pos in lazy:
+                    expanding.add(cell_pos)
+                    stack.append((cell_pos, True))
+                    for dep in dependencies.get(cell_pos, ()):
+                        if dep in lazy:
+                            stack.append((dep, False))
+        
+        return self._get_cell_value(row, col)
+    
+    def evaluate_pending(self, limit: int) -> bool:
+        """Evaluate up to limit pending cells; True while more remain"""
+        for row, col in list(islice(self._lazy_cells, limit)):
+            self.get_value_lazy(row, col)
+        return bool(self._lazy_cells)
+    
     def mark_dirty(self, cell: Tuple[int, int]):
         """Mark cell and all its dependents as dirty"""
         to_mark = {cell}
@@ -195,15 +235,26 @@ class CalculationEngine:
         if self.calculating or not self.dirty_cells:
             return
         
+        # Dirty cells are evaluated below; pending precedents must be evaluated first
+        lazy = self._lazy_cells
+        if lazy:
+            lazy.difference_update(self.dirty_cells)
+            dependencies = self.dependency_graph.dependencies
+            for cell_pos in self.dirty_cells:
+                for dep in dependencies.get(cell_pos, ()):
+                    if dep in lazy:
+                        self.get_value_lazy(dep[0], dep[1])
+        
         self.calculating = True
         
         try:
-            # Get topological order for dirty cells
-            calc_order = self.dependency_graph.topological_sort(self.dirty_cells)
+            # Get dependency levels for dirty cells
+            levels = self.dependency_graph.topological_levels(self.dirty_cells)
             
-            # Recalculate in order
-            for cell_pos in calc_order:
-                self._calculate_cell(cell_pos)
+            # Recalculate level by level; cells within a level are independent
+            for level in levels:
+                for cell_pos in level:
+                    self._calculate_cell(cell_pos)
             
             # Clear dirty cells
             self.dirty_cells.clear()
@@ -233,8 +284,18 @@ class CalculationEngine:
             # Formula
             if cell_pos in self.dependency_graph.ast_cache:
                 ast = self.dependency_graph.ast_cache[cell_pos]
-                evaluator = FormulaEvaluator(self._get_cell_value)
-                result = evaluator.evaluate(ast)
+                if cell._deps is None:
+                    cell._deps = collect_refs(ast)
+                
+                # Reuse the previous result when no referenced cell has changed since it was
+                # computed; cells stamp their own changes, so nothing is copied per dependency
+                if self._is_memo_fresh(cell):
+                    result = cell._cached_val
+                else:
+                    evaluator = FormulaEvaluator(self._get_cell_value, self._get_cell_value_by_key)
+                    result = evaluator.evaluate(ast)
+                    cell._evaluated_at = next_change_stamp()
+                    cell._cached_val = result
                 
                 if isinstance(result, str) and result.startswith('#'):
                     cell.error = result
@@ -245,6 +306,19 @@ class CalculationEngine:
                 cell.error = "#ERROR!"
                 cell.value = "#ERROR!"
     
+    def _is_memo_fresh(self, cell: Cell) -> bool:
+        """Check that no cell a formula references changed after its last evaluation"""
+        evaluated_at = cell._evaluated_at
+        sheet = self.model.sheet
+        if evaluated_at <= sheet.layout_changed_at:
+            return False
+        cells = sheet.cells
+        for pos in cell._deps:
+            dep = cells.get(pos)
+            if dep is not None and dep._changed_at > evaluated_at:
+                return False
+        return True
+    
     def _get_cell_value(self, row: int, col: int) -> Any:
         """Get cell value for formula evaluation"""
         if (row, col) not in self.model.sheet.cells:
@@ -253,13 +327,19 @@ class CalculationEngine:
         cell = self.model.sheet.cells[(row, col)]
         return cell.value if cell.value is not None else ""
     
+    def _get_cell_value_by_key(self, key: int) -> Any:
+        """Get cell value for formula evaluation by packed integer key"""
+        cell = self.model.sheet.get_cell_by_key(key)
+        if cell is None or cell.value is None:
+            return ""
+        return cell.value
+    
     def recalculate_all(self):
         """Force recalculation of all formula cells"""
-        formula_cells = set()
-        
-        for (row, col), cell in self.model.sheet.cells.items():
-            if cell.is_formula():
-                formula_cells.add((row, col))
+        # Re-register every formula so cells loaded from a file have parsed ASTs
+        self.mark_all_dirty()
+        formula_cells = set(self._lazy_cells)
+        self._lazy_cells.clear()
         
         self.dirty_cells.update(formula_cells)
         self.recalculate()
@@ -0,0 +1,93 @@
+"""
+Literal keyword search for Find & Replace.
+Implements an Aho-Corasick automaton that scans text once for all keywords.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import deque
+
+
+class KeywordMatcher:
+    """Aho-Corasick matcher for one or more literal keywords"""
+    
+    def __init__(self, keywords: Iterable[str], match_case: bool = True):
+        self.match_case = match_case
+        self._goto: List[Dict[str, int]] = [{}]  # Trie transitions per node
+        self._fail: List[int] = [0]  # Failure link per node
+        self._out: List[List[int]] = [[]]  # Lengths of keywords ending at each node
+        
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build()
+    
+    def _fold(self, ch: str) -> str:
+        return ch if self.match_case else ch.lower()
+    
+    def _add(self, keyword: str):
+        node = 0
+        for ch in keyword:
+            ch = self._fold(ch)
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append(len(keyword))
+    
+    def _build(self):
+        """Compute failure links breadth-first"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+    
+    def iter_all(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start, end) for every occurrence, including overlapping ones"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            ch = self._fold(ch)
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length in out[node]:
+                yield i + 1 - length, i + 1
+    
+    def finditer(self, text: str) -> List[Tuple[int, int]]:
+        """Get non-overlapping matches, preferring the leftmost then longest"""
+        spans = sorted(self.iter_all(text), key=lambda span: (span[0], -span[1]))
+        matches = []
+        last_end = 0
+        for start, end in spans:
+            if start >= last_end:
+                matches.append((start, end))
+                last_end = end
+        return matches
+    
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """Get the first match found scanning left to right, or None"""
+        return next(self.iter_all(text), None)
+    
+    def subn(self, replacement: str, text: str) -> Tuple[str, int]:
+        """Replace every match with literal text, returning (new_text, count)"""
+        matches = self.finditer(text)
+        if not matches:
+            return text, 0
+        
+        parts = []
+        pos = 0
+        for start, end in matches:
+            parts.append(text[pos:start])
+            parts.append(replacement)
+            pos = end
+        parts.append(text[pos:])
+        return ''.join(parts), len(matches)
\ No newline at end of file
@@ -6,7 +6,7 @@ from typing import List, Dict, Any, Union, Optional, Callable
 import re
 import math
 from enum import Enum
-from model import parse_address, parse_range, address_to_string
+from model import parse_address, parse_range, address_to_string, cell_key
 
 
 class TokenType(Enum):
@@ -32,6 +32,15 @@ class Token:
         return f"Token({self.type}, {self.value})"
 
 
+# Shared punctuation and operator tokens; position is informational only and
+# is not consumed by the parser, so these can be reused across formulas
+_LPAREN_TOK = Token(TokenType.LPAREN, '(', -1)
+_RPAREN_TOK = Token(TokenType.RPAREN, ')', -1)
+_COMMA_TOK = Token(TokenType.COMMA, ',', -1)
+_OPERATOR_TOKS = {op: Token(TokenType.OPERATOR, op, -1)
+                  for op in ('+', '-', '*', '/', '^', '=', '<', '>', '<=', '>=', '==')}
+
+
 class ASTNode:
     pass
 
@@ -50,6 +59,7 @@ class CellRefNode(ASTNode):
     def __init__(self, row: int, col: int):
         self.row = row
         self.col = col
+        self.key = cell_key(row, col)
 
 
 class RangeNode(ASTNode):
@@ -107,13 +117,13 @@ class FormulaTokenizer:
             elif char in '+-*/^=<>':
                 self._read_operator()
             elif char == '(':
-                self.tokens.append(Token(TokenType.LPAREN, char, self.position))
+                self.tokens.append(_LPAREN_TOK)
                 self.position += 1
             elif char == ')':
-                self.tokens.append(Token(TokenType.RPAREN, char, self.position))
+                self.tokens.append(_RPAREN_TOK)
                 self.position += 1
             elif char == ',':
-                self.tokens.append(Token(TokenType.COMMA, char, self.position))
+                self.tokens.append(_COMMA_TOK)
                 self.position += 1
             else:
                 self.position += 1  # Skip unknown characters
@@ -200,7 +210,18 @@ class FormulaTokenizer:
             self.position += 1
             value = char
         
-        self.tokens.append(Token(TokenType.OPERATOR, value, start))
+        token = _OPERATOR_TOKS.get(value)
+        self.tokens.append(token if token is not None else Token(TokenType.OPERATOR, value, start))
+
+
+# Binary operator precedence (higher binds tighter)
+_PRECEDENCE = {
+    '=': 1, '<>': 1, '<': 1, '<=': 1, '>': 1, '>=': 1,
+    '+': 2, '-': 2,
+    '*': 3, '/': 3,
+    '^': 4,
+}
+_RIGHT_ASSOC = {'^'}
 
 
 class FormulaParser:
@@ -221,48 +242,19 @@ class FormulaParser:
             self.current_token = self.tokens[self.position]
     
     def _parse_expression(self) -> ASTNode:
-        return self._parse_comparison()
+        return self._parse_binop(0)
     
-    def _parse_comparison(self) -> ASTNode:
-        node = self._parse_addition()
-        
-        while self.current_token.type == TokenType.OPERATOR and self.current_token.value in ['=', '<>', '<', '<=', '>', '>=']:
-            operator = self.current_token.value
-            self._advance()
-            right = self._parse_addition()
-            node = BinaryOpNode(node, operator, right)
-        
-        return node
-    
-    def _parse_addition(self) -> ASTNode:
-        node = self._parse_multiplication()
-        
-        while self.current_token.type == TokenType.OPERATOR and self.current_token.value in ['+', '-']:
-            operator = self.current_token.value
-            self._advance()
-            right = self._parse_multiplication()
-            node = BinaryOpNode(node, operator, right)
-        
-        return node
-    
-    def _parse_multiplication(self) -> ASTNode:
-        node = self._parse_power()
-        
-        while self.current_token.type == TokenType.OPERATOR and self.current_token.value in ['*', '/']:
-            operator = self.current_token.value
-            self._advance()
-            right = self._parse_power()
-            node = BinaryOpNode(node, operator, right)
-        
-        return node
-    
-    def _parse_power(self) -> ASTNode:
+    def _parse_binop(self, min_prec: int) -> ASTNode:
+        """Precedence-climbing loop over binary operators"""
         node = self._parse_unary()
         
-        if self.current_token.type == TokenType.OPERATOR and self.current_token.value == '^':
+        while self.current_token.type == TokenType.OPERATOR:
             operator = self.current_token.value
+            prec = _PRECEDENCE.get(operator)
+            if prec is None or prec < min_prec:
+                break
             self._advance()
-            right = self._parse_power()  # Right associative
+            right = self._parse_binop(prec if operator in _RIGHT_ASSOC else prec + 1)
             node = BinaryOpNode(node, operator, right)
         
         return node
@@ -337,8 +329,10 @@ class FormulaParser:
 class FormulaEvaluator:
     """Evaluates parsed formula AST"""
     
-    def __init__(self, get_cell_value: Callable[[int, int], Any]):
+    def __init__(self, get_cell_value: Callable[[int, int], Any],
+                 get_cell_value_by_key: Optional[Callable[[int], Any]] = None):
         self.get_cell_value = get_cell_value
+        self.get_cell_value_by_key = get_cell_value_by_key
         self.functions = {
             'SUM': self._sum,
             'AVERAGE': self._average,
@@ -371,7 +365,10 @@ class FormulaEvaluator:
         
         elif isinstance(node, CellRefNode):
             try:
-                value = self.get_cell_value(node.row, node.col)
+                if self.get_cell_value_by_key is not None:
+                    value = self.get_cell_value_by_key(node.key)
+                else:
+                    value = self.get_cell_value(node.row, node.col)
                 return self._to_number(value) if isinstance(value, str) and value.replace('.', '').replace('-', '').isdigit() else value
             except:
                 return "#REF!"
@@ -446,6 +443,9 @@ class FormulaEvaluator:
         if func_name not in self.functions:
             return "#NAME?"
         
+        if func_name == 'IF':
+            return self._evaluate_if(node)
+        
         args = [self._evaluate_node(arg) for arg in node.args]
         
         # Check for errors in arguments
@@ -455,24 +455,55 @@ class FormulaEvaluator:
         
         return self.functions[func_name](args)
     
+    def _evaluate_if(self, node: FunctionNode) -> Any:
+        """Evaluate IF lazily, only walking the selected branch"""
+        if len(node.args) < 2:
+            return "#VALUE!"
+        
+        condition = self._evaluate_node(node.args[0])
+        if isinstance(condition, str) and condition.startswith('#'):
+            return condition
+        
+        if self._is_truthy(condition):
+            branch = node.args[1]
+        elif len(node.args) > 2:
+            branch = node.args[2]
+        else:
+            return ""
+        return self._evaluate_node(branch)
+    
+    def _is_truthy(self, value: Any) -> bool:
+        """Interpret a value as a condition"""
+        if isinstance(value, bool):
+            return value
+        return self._to_number(value) != 0
+    
     def _to_number(self, value: Any) -> float:
         """Convert value to number"""
-        if isinstance(value, (int, float)):
+        # Exact type checks are cheaper than isinstance on this hot path
+        t = type(value)
+        if t is float:
+            return value
+        if t is int:
             return float(value)
-        elif isinstance(value, str):
-            if value == "":
+        if t is str:
+            if not value:
                 return 0.0
-            try:
-                return float(value)
-            except ValueError:
-                raise ValueError(f"Cannot convert '{value}' to number")
-        elif isinstance(value, bool):
+            return float(value)  # Raises ValueError for non-numeric text
+        if t is bool:
             return 1.0 if value else 0.0
-        else:
-            raise ValueError(f"Cannot convert {type(value)} to number")
+        if isinstance(value, (int, float)):
+            return float(value)
+        raise ValueError(f"Cannot convert {t} to number")
     
     def _flatten_ranges(self, args: List[Any]) -> List[Any]:
         """Flatten range arguments into individual values"""
+        # Fast paths: a single range, or no ranges at all, need no copy
+        if len(args) == 1 and isinstance(args[0], list):
+            return args[0]
+        if not any(isinstance(arg, list) for arg in args):
+            return args
+        
         result = []
         for arg in args:
             if isinstance(arg, list):
@@ -523,10 +554,7 @@ class FormulaEvaluator:
         true_value = args[1]
         false_value = args[2] if len(args) > 2 else ""
         
-        if isinstance(condition, bool):
-            return true_value if condition else false_value
-        else:
-            return true_value if self._to_number(condition) != 0 else false_value
+        return true_value if self._is_truthy(condition) else false_value
     
     def _abs(self, args: List[Any]) -> float:
         if len(args) != 1:
@@ -545,12 +573,82 @@ class FormulaEvaluator:
         return "".join(str(arg) for arg in args)
 
 
+def collect_refs(ast: ASTNode) -> tuple:
+    """Collect referenced (row, col) positions in evaluation order, without duplicates"""
+    refs = {}
+    
+    def visit(node: ASTNode):
+        if isinstance(node, CellRefNode):
+            refs[(node.row, node.col)] = None
+        elif isinstance(node, RangeNode):
+            for pos in node.cells:
+                refs[pos] = None
+        elif isinstance(node, BinaryOpNode):
+            visit(node.left)
+            visit(node.right)
+        elif isinstance(node, UnaryOpNode):
+            visit(node.operand)
+        elif isinstance(node, FunctionNode):
+            for arg in node.args:
+                visit(arg)
+    
+    visit(ast)
+    return tuple(refs)
+
+
+# Functions that depend only on their arguments and may be folded at parse time
+FOLDABLE_FUNCTIONS = {'ABS', 'ROUND', 'CONCAT'}
+
+
+def _is_literal(node: ASTNode) -> bool:
+    return isinstance(node, (NumberNode, StringNode))
+
+
+def _literal_node(value: Any) -> Optional[ASTNode]:
+    """Wrap a folded value in a literal node, or None if it cannot be represented"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return NumberNode(value)
+    if isinstance(value, str) and not value.startswith('#'):
+        return StringNode(value)
+    return None
+
+
+def fold(node: ASTNode) -> ASTNode:
+    """Constant-fold subtrees whose leaves are all literals"""
+    if isinstance(node, BinaryOpNode):
+        node.left = fold(node.left)
+        node.right = fold(node.right)
+        if not (isinstance(node.left, NumberNode) and isinstance(node.right, NumberNode)):
+            return node
+    elif isinstance(node, UnaryOpNode):
+        node.operand = fold(node.operand)
+        if not isinstance(node.operand, NumberNode):
+            return node
+    elif isinstance(node, FunctionNode):
+        node.args = [fold(arg) for arg in node.args]
+        if node.name.upper() not in FOLDABLE_FUNCTIONS or not all(_is_literal(arg) for arg in node.args):
+            return node
+    else:
+        return node
+    
+    # All leaves are literals: evaluate once, keeping the node if evaluation fails
+    try:
+        value = FormulaEvaluator(lambda row, col: "")._evaluate_node(node)
+    except Exception:
+        return node
+    
+    folded = _literal_node(value)
+    return folded if folded is not None else node
+
+
 def parse_formula(formula: str) -> ASTNode:
     """Parse formula string into AST"""
     tokenizer = FormulaTokenizer(formula)
     tokens = tokenizer.tokenize()
     parser = FormulaParser(tokens)
-    return parser.parse()
+    return fold(parser.parse())
 
 
 def evaluate_formula(formula: str, get_cell_value: Callable[[int, int], Any]) -> Any:
@@ -2,11 +2,28 @@
 Data model for spreadsheet application.
 Handles cell storage, addressing, and formatting.
 """
-from typing import Dict, Tuple, Optional, Any, List
+from typing import Dict, Tuple, Optional, Any, List, Set, Callable
+from functools import lru_cache
+from contextlib import contextmanager
+from itertools import count
 import json
 import re
 
 
+# Version of the serialized workbook layout produced by SpreadsheetModel.to_dict
+FORMAT_VERSION = 2
+
+# Bits reserved for the column in a packed integer cell key
+KEY_SHIFT = 20
+
+# Characters of a display value that fit in a grid cell
+SHORT_DISPLAY_WIDTH = 10
+
+# Monotonic clock for change stamps; a larger stamp is a later change
+next_change_stamp = count(1).__next__
+
+
+@lru_cache(maxsize=4096)
 def col_to_letter(col: int) -> str:
     """Convert 0-based column index to letter (A, B, ..., Z, AA, AB, ...)"""
     result = ""
@@ -18,6 +35,7 @@ def col_to_letter(col: int) -> str:
     return result
 
 
+@lru_cache(maxsize=4096)
 def letter_to_col(letter: str) -> int:
     """Convert column letter to 0-based index"""
     result = 0
@@ -26,6 +44,12 @@ def letter_to_col(letter: str) -> int:
     return result - 1
 
 
+def cell_key(row: int, col: int) -> int:
+    """Pack (row, col) into a single integer key"""
+    return (row << KEY_SHIFT) | col
+
+
+@lru_cache(maxsize=4096)
 def parse_address(addr: str) -> Tuple[int, int]:
     """Parse cell address like 'A1' to (row, col) 0-based"""
     match = re.match(r'^([A-Z]+)(\d+)$', addr.upper())
@@ -60,11 +84,89 @@ def parse_range(range_str: str) -> List[Tuple[int, int]]:
 class Cell:
     """Represents a single spreadsheet cell"""
     
+    __slots__ = ('raw', '_value', '_format', '_error', '_cached_display',
+                 '_cached_short', '_changed_at', '_deps', '_evaluated_at', '_cached_val')
+    
     def __init__(self, raw: str = "", value: Any = "", format_dict: Optional[Dict] = None):
         self.raw = raw  # Raw input (formula or literal)
-        self.value = value  # Evaluated value
-        self.format = format_dict or {}  # Formatting options
-        self.error = None  # Error message if any
+        self._value = value  # Evaluated value
+        self._format = format_dict or {}  # Formatting options
+        self._error = None  # Error message if any
+        self._cached_display = None  # Formatted display string, built on first read
+        self._cached_short = None  # Display string truncated to SHORT_DISPLAY_WIDTH
+        self._changed_at = next_change_stamp()  # Stamp of the last change to the value
+        self.reset_dependency_cache()
+    
+    @property
+    def value(self) -> Any:
+        return self._value
+    
+    @value.setter
+    def value(self, value: Any):
+        old = self._value
+        if type(value) is not type(old) or value != old:
+            self._changed_at = next_change_stamp()
+        self._value = value
+        self._invalidate_display()
+    
+    @property
+    def format(self) -> Dict:
+        return self._format
+    
+    @format.setter
+    def format(self, format_dict: Dict):
+        self._format = format_dict
+        self._invalidate_display()
+    
+    @property
+    def error(self) -> Optional[str]:
+        return self._error
+    
+    @error.setter
+    def error(self, error: Optional[str]):
+        self._error = error
+        self._invalidate_display()
+    
+    def _invalidate_display(self):
+        self._cached_display = None
+        self._cached_short = None
+    
+    def update_format(self, changes: Dict):
+        """Apply formatting changes without mutating the current format dict"""
+        self.format = {**self._format, **changes}
+    
+    def reset_dependency_cache(self):
+        """Forget memoized formula result so the next recalculation evaluates it"""
+        self._deps = None  # Referenced (row, col) positions
+        self._evaluated_at = 0  # Change stamp taken after the last evaluation
+        self._cached_val = None  # Result of last evaluation
+    
+    def get_display_value(self) -> str:
+        """Get formatted value for display"""
+        display = self._cached_display
+        if display is None:
+            display = self._format_display()
+            self._cached_display = display
+        return display
+    
+    @property
+    def display_short(self) -> str:
+        """Display value truncated to fit a grid cell"""
+        short = self._cached_short
+        if short is None:
+            short = self.get_display_value()[:SHORT_DISPLAY_WIDTH]
+            self._cached_short = short
+        return short
+    
+    def _format_display(self) -> str:
+        if self._error:
+            return self._error
+        
+        value = self._value
+        if isinstance(value, float):
+            precision = self._format.get('precision', 2)
+            return f"{value:.{precision}f}"
+        return str(value)
     
     def is_formula(self) -> bool:
         """Check if cell contains a formula"""
@@ -92,36 +194,97 @@ class Sheet:
     
     def __init__(self):
         self.cells: Dict[Tuple[int, int], Cell] = {}
+        self._flat_cells: Dict[int, Cell] = {}  # Same cells keyed by cell_key()
+        self.cells_by_row: Dict[int, Dict[int, Cell]] = {}  # row -> {col: cell}
+        self.cells_by_col: Dict[int, Dict[int, Cell]] = {}  # col -> {row: cell}
         self.name = "Sheet1"
         self.max_row = 0
         self.max_col = 0
+        self.layout_changed_at = 0  # Stamp of the last cell deletion or move
     
     def get_cell(self, row: int, col: int) -> Cell:
         """Get cell at position, creating empty cell if needed"""
         if (row, col) not in self.cells:
-            self.cells[(row, col)] = Cell()
+            self._store(row, col, Cell())
         return self.cells[(row, col)]
     
+    def get_cell_by_key(self, key: int) -> Optional[Cell]:
+        """Get cell by packed integer key, or None if empty"""
+        return self._flat_cells.get(key)
+    
     def set_cell(self, row: int, col: int, raw: str, value: Any = None, format_dict: Optional[Dict] = None):
         """Set cell content"""
-        cell = Cell(raw, value if value is not None else raw, format_dict)
-        self.cells[(row, col)] = cell
+        self._store(row, col, Cell(raw, value if value is not None else raw, format_dict))
         self.max_row = max(self.max_row, row)
         self.max_col = max(self.max_col, col)
     
     def delete_cell(self, row: int, col: int):
         """Delete cell content"""
         if (row, col) in self.cells:
+            self.layout_changed_at = next_change_stamp()
             del self.cells[(row, col)]
+            del self._flat_cells[cell_key(row, col)]
+            
+            row_cells = self.cells_by_row[row]
+            del row_cells[col]
+            if not row_cells:
+                del self.cells_by_row[row]
+            col_cells = self.cells_by_col[col]
+            del col_cells[row]
+            if not col_cells:
+                del self.cells_by_col[col]
+    
+    def _store(self, row: int, col: int, cell: Cell):
+        """Put a cell in the main dict and every index"""
+        self.cells[(row, col)] = cell
+        self._flat_cells[cell_key(row, col)] = cell
+        self.cells_by_row.setdefault(row, {})[col] = cell
+        self.cells_by_col.setdefault(col, {})[row] = cell
+    
+    def rebuild_index(self):
+        """Rebuild the secondary indexes after bulk changes to cells"""
+        self.layout_changed_at = next_change_stamp()
+        self._flat_cells = {cell_key(r, c): cell for (r, c), cell in self.cells.items()}
+        self.cells_by_row = {}
+        self.cells_by_col = {}
+        for (r, c), cell in self.cells.items():
+            self.cells_by_row.setdefault(r, {})[c] = cell
+            self.cells_by_col.setdefault(c, {})[r] = cell
+    
+    def iter_non_empty_cells(self):
+        """Yield (row, col, cell) for cells with content, in row-major order"""
+        for (row, col), cell in sorted(self.cells.items(), key=lambda item: item[0]):
+            if cell.raw:
+                yield row, col, cell
+    
+    def iter_non_empty_from(self, row: int, col: int):
+        """Yield (row, col, cell) with content in row-major order after (row, col), wrapping around to it"""
+        by_row = self.cells_by_row
+        if not by_row:
+            return
+        
+        # Walks the row index, sorting one row's columns at a time instead of every cell
+        first_row, last_row = min(by_row), max(by_row)
+        passes = ((range(row, last_row + 1), lambda r, c: r > row or c > col),
+                  (range(first_row, row + 1), lambda r, c: r < row or c <= col))
+        for rows, wanted in passes:
+            for r in rows:
+                row_cells = by_row.get(r)
+                if not row_cells:
+                    continue
+                for c in sorted(row_cells):
+                    cell = row_cells[c]
+                    if cell.raw and wanted(r, c):
+                        yield r, c, cell
     
     def get_used_range(self) -> Tuple[int, int, int, int]:
         """Get bounds of used cells (min_row, min_col, max_row, max_col)"""
         if not self.cells:
             return 0, 0, 0, 0
         
-        rows = [pos[0] for pos in self.cells.keys()]
-        cols = [pos[1] for pos in self.cells.keys()]
-        return min(rows), min(cols), max(rows), max(cols)
+        # Tuple ordering gives the row bounds directly from the keys
+        cols = [col for _, col in self.cells]
+        return min(self.cells)[0], min(cols), max(self.cells)[0], max(cols)
     
     def insert_row(self, row: int):
         """Insert row at position, shifting cells down"""
@@ -132,6 +295,7 @@ class Sheet:
             else:
                 new_cells[(r, c)] = cell
         self.cells = new_cells
+        self.rebuild_index()
         self.max_row += 1
     
     def delete_row(self, row: int):
@@ -145,6 +309,7 @@ class Sheet:
             else:
                 new_cells[(r, c)] = cell
         self.cells = new_cells
+        self.rebuild_index()
         if self.max_row > 0:
             self.max_row -= 1
     
@@ -157,6 +322,7 @@ class Sheet:
             else:
                 new_cells[(r, c)] = cell
         self.cells = new_cells
+        self.rebuild_index()
         self.max_col += 1
     
     def delete_column(self, col: int):
@@ -170,6 +336,7 @@ class Sheet:
             else:
                 new_cells[(r, c)] = cell
         self.cells = new_cells
+        self.rebuild_index()
         if self.max_col > 0:
             self.max_col -= 1
 
@@ -182,13 +349,27 @@ class SpreadsheetModel:
         self.filename = None
         self.modified = False
         self.observers = []  # Callbacks for model changes
+        self._batch_depth = 0  # Nesting level of batched blocks
+        self._batch_cells: List[Tuple[int, int]] = []  # Cells changed during a batch
+        self._batch_events: List[str] = []  # Other events queued during a batch
+        self.pending_cells: Set[Tuple[int, int]] = set()  # Formula cells awaiting lazy evaluation
+        self.resolve_pending: Optional[Callable[[int, int], Any]] = None  # Evaluates a pending cell
     
     def add_observer(self, callback):
         """Add observer for model changes"""
         self.observers.append(callback)
     
     def notify_observers(self, event_type: str, **kwargs):
-        """Notify observers of model changes"""
+        """Notify observers of model changes, queueing them while batched"""
+        if self._batch_depth:
+            if event_type == 'cell_changed':
+                self._batch_cells.append((kwargs['row'], kwargs['col']))
+            elif event_type == 'cells_changed':
+                self._batch_cells.extend(kwargs['cells'])
+            elif event_type not in self._batch_events:
+                self._batch_events.append(event_type)
+            return
+        
         for callback in self.observers:
             callback(event_type, **kwargs)
     
@@ -198,30 +379,164 @@ class SpreadsheetModel:
         self.modified = True
         self.notify_observers('cell_changed', row=row, col=col)
     
+    def begin_batch(self):
+        """Start queueing change notifications"""
+        self._batch_depth += 1
+    
+    def end_batch(self):
+        """Flush queued notifications once the outermost batch ends"""
+        self._batch_depth -= 1
+        if self._batch_depth:
+            return
+        
+        events, cells = self._batch_events, self._batch_cells
+        self._batch_events, self._batch_cells = [], []
+        for event_type in events:
+            self.notify_observers(event_type)
+        if len(cells) == 1:
+            self.notify_observers('cell_changed', row=cells[0][0], col=cells[0][1])
+        elif cells:
+            self.notify_observers('cells_changed', cells=cells)
+    
+    @contextmanager
+    def batched(self):
+        """Coalesce change notifications until the outermost block exits"""
+        self.begin_batch()
+        try:
+            yield self
+        finally:
+            self.end_batch()
+    
+    def set_cells_bulk(self, updates):
+        """Set raw content for many (row, col, raw) updates with a single notification"""
+        with self.batched():
+            set_cell = self.sheet.set_cell
+            changed = self._batch_cells
+            for row, col, raw in updates:
+                set_cell(row, col, raw)
+                changed.append((row, col))
+            if changed:
+                self.modified = True
+    
+    def _resolve_window(self, start_row: int, end_row: int, start_col: int, end_col: int):
+        """Evaluate pending formula cells inside a half-open window"""
+        pending = self.pending_cells
+        if not pending:
+            return
+        
+        if len(pending) < (end_row - start_row) * (end_col - start_col):
+            targets = [(row, col) for row, col in pending
+                       if start_row <= row < end_row and start_col <= col < end_col]
+        else:
+            targets = [(row, col) for row in range(start_row, end_row)
+                       for col in range(start_col, end_col) if (row, col) in pending]
+        for row, col in targets:
+            if (row, col) in pending:
+                self.resolve_pending(row, col)
+    
+    def flush_pending(self):
+        """Evaluate every pending formula cell"""
+        for row, col in list(self.pending_cells):
+            if (row, col) in self.pending_cells:
+                self.resolve_pending(row, col)
+    
     def get_cell_display_value(self, row: int, col: int) -> str:
         """Get cell value for display"""
         if (row, col) not in self.sheet.cells:
             return ""
         
-        cell = self.sheet.cells[(row, col)]
-        if cell.error:
-            return cell.error
+        if (row, col) in self.pending_cells:
+            self.resolve_pending(row, col)
+        return self.sheet.cells[(row, col)].get_display_value()
+    
+    def get_cell_display_short(self, row: int, col: int) -> str:
+        """Get cell value for display, truncated to fit a grid cell"""
+        cell = self.sheet.cells.get((row, col))
+        if cell is None:
+            return ""
         
-        value = cell.value
-        if isinstance(value, float):
-            precision = cell.format.get('precision', 2)
-            return f"{value:.{precision}f}"
-        return str(value)
+        if (row, col) in self.pending_cells:
+            self.resolve_pending(row, col)
+        return cell.display_short
+    
+    def get_range_display_values(self, start_row: int, start_col: int,
+                                 end_row: int, end_col: int) -> List[List[str]]:
+        """Get display values for an inclusive range as a list of rows"""
+        height = end_row - start_row + 1
+        width = end_col - start_col + 1
+        if height <= 0 or width <= 0:
+            return []
+        
+        self._resolve_window(start_row, end_row + 1, start_col, end_col + 1)
+        rows = [[""] * width for _ in range(height)]
+        cells = self.sheet.cells
+        
+        # Walk whichever is smaller: the sparse cell store or the range area
+        if len(cells) < height * width:
+            for (row, col), cell in cells.items():
+                if start_row <= row <= end_row and start_col <= col <= end_col:
+                    rows[row - start_row][col - start_col] = cell.get_display_value()
+        else:
+            for row in range(start_row, end_row + 1):
+                row_values = rows[row - start_row]
+                for col in range(start_col, end_col + 1):
+                    cell = cells.get((row, col))
+                    if cell is not None:
+                        row_values[col - start_col] = cell.get_display_value()
+        
+        return rows
+    
+    def get_display_window(self, start_row: int, end_row: int,
+                           start_col: int, end_col: int) -> Tuple[List[str], List[bool]]:
+        """Get row-major short display values and error flags for a half-open window"""
+        width = end_col - start_col
+        if end_row <= start_row or width <= 0:
+            return [], []
+        
+        self._resolve_window(start_row, end_row, start_col, end_col)
+        values = [""] * ((end_row - start_row) * width)
+        cells = self.sheet.cells
+        
+        # Walk whichever is smaller: the sparse cell store or the window area
+        if len(cells) < len(values):
+            for (row, col), cell in cells.items():
+                if start_row <= row < end_row and start_col <= col < end_col:
+                    values[(row - start_row) * width + col - start_col] = cell.display_short
+        else:
+            i = 0
+            for row in range(start_row, end_row):
+                for col in range(start_col, end_col):
+                    cell = cells.get((row, col))
+                    if cell is not None:
+                        values[i] = cell.display_short
+                    i += 1
+        
+        errors = [value[:1] == '#' for value in values]
+        return values, errors
     
     def to_dict(self) -> Dict:
-        """Serialize model to dictionary"""
-        cells_dict = {}
+        """Serialize model to dictionary using columnar cell storage"""
+        self.flush_pending()
+        rows, cols, raws, values, formats, errors = [], [], [], [], [], []
         for (row, col), cell in self.sheet.cells.items():
-            cells_dict[f"{row},{col}"] = cell.to_dict()
+            rows.append(row)
+            cols.append(col)
+            raws.append(cell.raw)
+            values.append(cell.value)
+            formats.append(cell.format)
+            errors.append(cell.error)
         
         return {
+            'version': FORMAT_VERSION,
             'sheet_name': self.sheet.name,
-            'cells': cells_dict,
+            'cells': {
+                'rows': rows,
+                'cols': cols,
+                'raws': raws,
+                'values': values,
+                'formats': formats,
+                'errors': errors
+            },
             'max_row': self.sheet.max_row,
             'max_col': self.sheet.max_col
         }
@@ -234,9 +549,21 @@ class SpreadsheetModel:
         self.sheet.max_col = data.get('max_col', 0)
         
         cells_dict = data.get('cells', {})
-        for pos_str, cell_data in cells_dict.items():
-            row, col = map(int, pos_str.split(','))
-            self.sheet.cells[(row, col)] = Cell.from_dict(cell_data)
+        if data.get('version', 1) >= 2:
+            columns = zip(cells_dict.get('rows', []), cells_dict.get('cols', []),
+                          cells_dict.get('raws', []), cells_dict.get('values', []),
+                          cells_dict.get('formats', []), cells_dict.get('errors', []))
+            for row, col, raw, value, format_dict, error in columns:
+                cell = Cell(raw, value, format_dict)
+                cell.error = error
+                self.sheet.cells[(row, col)] = cell
+        else:
+            # Legacy format: one dictionary per cell keyed by "row,col"
+            for pos_str, cell_data in cells_dict.items():
+                row, col = map(int, pos_str.split(','))
+                self.sheet.cells[(row, col)] = Cell.from_dict(cell_data)
+        
+        self.sheet.rebuild_index()
         
         self.modified = False
         self.notify_observers('model_loaded')
\ No newline at end of file
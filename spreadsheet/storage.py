@@ -4,23 +4,93 @@ Handles JSON save/load and CSV import/export.
 """
 import json
 import csv
+import io
+import math
+import mmap
 import os
+import re
+import queue
+import shutil
+import threading
+from itertools import islice
 from typing import Optional, Tuple, List, Dict, Any
 from model import SpreadsheetModel, parse_address, address_to_string
 
+try:
+    import orjson  # Optional: much faster JSON encode/decode
+except ImportError:
+    orjson = None
+
+# Numeric CSV field; groups 1-3 are set only for float syntax
+_NUM_RE = re.compile(r'[-+]?(?:\d+(\.\d*)?|(\.\d+))([eE][-+]?\d+)?\Z')
+
+# Buffer size for bulk CSV file I/O
+IO_BUFFER_SIZE = 1 << 20
+
+# Number of CSV rows parsed and written to the model per block
+IMPORT_CHUNK_ROWS = 1024
+
+
+def _classify_csv_rows(rows: List[List[str]], start_row: int, start_col: int,
+                       match_number=_NUM_RE.match) -> List[Tuple[int, int, str]]:
+    """Convert a block of CSV rows to (row, col, raw) updates, skipping blank fields"""
+    updates = []
+    add_update = updates.append
+    for row, row_data in enumerate(rows, start_row):
+        for col, value in enumerate(row_data, start_col):
+            if not value or value.isspace():
+                continue
+            # Normalize numbers; anything else is kept as text
+            match = match_number(value)
+            if match is None:
+                add_update((row, col, value))
+            elif match.lastindex is None:
+                add_update((row, col, str(int(value))))
+            else:
+                # Exponents too large for a float (1e400) overflow to inf; keep them as text
+                number = float(value)
+                add_update((row, col, value if math.isinf(number) else str(number)))
+    return updates
+
+
+def _dump_json_bytes(data: Dict) -> bytes:
+    """Serialize data to compact UTF-8 encoded JSON"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """Write data to path via a synced temporary file and an atomic rename"""
+    tmp_path = path + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        os.fsync(fd)
+    except BaseException:
+        os.close(fd)
+        os.remove(tmp_path)
+        raise
+    os.close(fd)
+    os.replace(tmp_path, path)
+
 
 class StorageManager:
     """Handles file operations for spreadsheet data"""
     
     def __init__(self, model: SpreadsheetModel):
         self.model = model
+        self._autosave_queue: "queue.Queue[Tuple[str, Dict]]" = queue.Queue(maxsize=1)
+        self._autosave_thread: Optional[threading.Thread] = None
     
     def save_json(self, filename: str) -> bool:
         """Save spreadsheet to JSON file"""
         try:
-            data = self.model.to_dict()
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # Serialize to one buffer and replace the file atomically
+            _atomic_write_bytes(filename, _dump_json_bytes(self.model.to_dict()))
             
             self.model.filename = filename
             self.model.modified = False
@@ -33,8 +103,14 @@ class StorageManager:
     def load_json(self, filename: str) -> bool:
         """Load spreadsheet from JSON file"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(filename, 'rb') as f:
+                if orjson is not None:
+                    # Parse straight from the mapped page cache, without a read copy
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        with memoryview(mm) as view:
+                            data = orjson.loads(view)
+                else:
+                    data = json.loads(f.read())
             
             self.model.from_dict(data)
             self.model.filename = filename
@@ -61,15 +137,9 @@ class StorageManager:
             if start_row > end_row or start_col > end_col:
                 return False
             
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
+            with open(filename, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
                 writer = csv.writer(f)
-                
-                for row in range(start_row, end_row + 1):
-                    row_data = []
-                    for col in range(start_col, end_col + 1):
-                        value = self.model.get_cell_display_value(row, col)
-                        row_data.append(value)
-                    writer.writerow(row_data)
+                writer.writerows(self.model.get_range_display_values(start_row, start_col, end_row, end_col))
             
             return True
         
@@ -80,109 +150,107 @@ class StorageManager:
     def import_csv(self, filename: str, start_row: int = 0, start_col: int = 0, 
                    has_headers: bool = False) -> bool:
         """Import CSV file into spreadsheet"""
+        updates = self.read_csv_updates(filename, start_row, start_col)
+        if updates is None:
+            return False
+        
+        self.model.set_cells_bulk(updates)
+        return True
+    
+    def read_csv_updates(self, filename: str, start_row: int = 0,
+                         start_col: int = 0) -> Optional[List[Tuple[int, int, str]]]:
+        """Parse a CSV file into (row, col, raw) updates without touching the model, or None on error"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
+            updates = []
+            with open(filename, 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as f:
                 reader = csv.reader(f)
                 
                 current_row = start_row
-                for row_data in reader:
-                    current_col = start_col
-                    for cell_value in row_data:
-                        if cell_value.strip():  # Only import non-empty cells
-                            # Try to convert to number if possible
-                            try:
-                                if '.' in cell_value:
-                                    numeric_value = float(cell_value)
-                                else:
-                                    numeric_value = int(cell_value)
-                                self.model.set_cell_raw(current_row, current_col, str(numeric_value))
-                            except ValueError:
-                                # Keep as string
-                                self.model.set_cell_raw(current_row, current_col, cell_value)
-                        
-                        current_col += 1
-                    current_row += 1
+                while True:
+                    block = list(islice(reader, IMPORT_CHUNK_ROWS))
+                    if not block:
+                        break
+                    updates.extend(_classify_csv_rows(block, current_row, start_col))
+                    current_row += len(block)
             
-            return True
+            return updates
         
         except Exception as e:
             print(f"Error importing CSV: {e}")
-            return False
+            return None
     
     def get_range_as_csv_string(self, start_row: int, start_col: int, 
                                end_row: int, end_col: int) -> str:
         """Get range data as CSV string for clipboard operations"""
-        lines = []
-        
-        for row in range(start_row, end_row + 1):
-            row_data = []
-            for col in range(start_col, end_col + 1):
-                value = self.model.get_cell_display_value(row, col)
-                # Escape quotes and commas for CSV
-                if '"' in value or ',' in value or '\n' in value:
-                    value = '"' + value.replace('"', '""') + '"'
-                row_data.append(value)
-            lines.append(','.join(row_data))
+        # CRLF rows (RFC 4180) so fields containing '\r' or '\n' are quoted
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator='\r\n')
+        writer.writerows(self.model.get_range_display_values(start_row, start_col, end_row, end_col))
         
-        return '\n'.join(lines)
+        # Clipboard text has no trailing line terminator
+        text = buf.getvalue()
+        return text[:-2] if text.endswith('\r\n') else text
     
     def set_range_from_csv_string(self, csv_string: str, start_row: int, start_col: int):
         """Set range data from CSV string (for clipboard paste)"""
-        lines = csv_string.strip().split('\n')
+        # Spreadsheet apps put tab-separated text on the clipboard; fall back to plain CSV
+        try:
+            dialect = csv.Sniffer().sniff(csv_string[:1024], delimiters=',\t')
+        except csv.Error:
+            dialect = csv.excel
         
-        current_row = start_row
-        for line in lines:
-            # Simple CSV parsing (doesn't handle all edge cases)
-            values = []
-            current_value = ""
-            in_quotes = False
-            
-            i = 0
-            while i < len(line):
-                char = line[i]
-                
-                if char == '"' and not in_quotes:
-                    in_quotes = True
-                elif char == '"' and in_quotes:
-                    if i + 1 < len(line) and line[i + 1] == '"':
-                        current_value += '"'
-                        i += 1
-                    else:
-                        in_quotes = False
-                elif char == ',' and not in_quotes:
-                    values.append(current_value)
-                    current_value = ""
-                else:
-                    current_value += char
-                
-                i += 1
-            
-            values.append(current_value)  # Add last value
-            
+        reader = csv.reader(io.StringIO(csv_string), dialect, skipinitialspace=False)
+        set_raw = self.model.set_cell_raw
+        
+        for row_offset, values in enumerate(reader):
             current_col = start_col
             for value in values:
-                if value.strip():
-                    self.model.set_cell_raw(current_row, current_col, value)
+                if value and not value.isspace():
+                    set_raw(start_row + row_offset, current_col, value)
                 current_col += 1
-            
-            current_row += 1
     
     def auto_save(self) -> bool:
-        """Auto-save to temporary file"""
+        """Queue a background auto-save next to the current file; newest snapshot wins"""
         if not self.model.filename:
             return False
         
         try:
-            temp_filename = self.model.filename + '.tmp'
-            if self.save_json(temp_filename):
-                # Restore original filename
-                self.model.filename = self.model.filename.replace('.tmp', '')
-                return True
-            return False
+            data = self.model.to_dict()
+            # Format dicts are shared with live cells; copy them so edits can't race the writer
+            cells = data['cells']
+            cells['formats'] = [dict(format_dict) for format_dict in cells['formats']]
+            item = (self.model.filename + '.autosave', data)
+            
+            try:
+                self._autosave_queue.put_nowait(item)
+            except queue.Full:
+                # Replace the pending snapshot so bursts of edits produce one write
+                try:
+                    self._autosave_queue.get_nowait()
+                    self._autosave_queue.task_done()
+                except queue.Empty:
+                    pass
+                self._autosave_queue.put_nowait(item)
+            
+            if self._autosave_thread is None:
+                self._autosave_thread = threading.Thread(target=self._autosave_worker, daemon=True)
+                self._autosave_thread.start()
+            return True
         
         except Exception:
             return False
     
+    def _autosave_worker(self):
+        """Write queued auto-save snapshots off the calling thread"""
+        while True:
+            filename, data = self._autosave_queue.get()
+            try:
+                _atomic_write_bytes(filename, _dump_json_bytes(data))
+            except Exception as e:
+                print(f"Error auto-saving file: {e}")
+            finally:
+                self._autosave_queue.task_done()
+    
     def create_backup(self) -> bool:
         """Create backup of current file"""
         if not self.model.filename or not os.path.exists(self.model.filename):
@@ -190,9 +258,7 @@ class StorageManager:
         
         try:
             backup_filename = self.model.filename + '.bak'
-            with open(self.model.filename, 'r', encoding='utf-8') as src:
-                with open(backup_filename, 'w', encoding='utf-8') as dst:
-                    dst.write(src.read())
+            shutil.copyfile(self.model.filename, backup_filename)
             return True
         
         except Exception:
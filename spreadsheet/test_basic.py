@@ -6,14 +6,17 @@ Run this to verify core components work correctly.
 
 import sys
 import os
+import tempfile
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from model import SpreadsheetModel, parse_address, address_to_string, col_to_letter, letter_to_col
-from formula import parse_formula, evaluate_formula
+from formula import parse_formula, evaluate_formula, NumberNode, BinaryOpNode
 from engine import CalculationEngine
 from storage import StorageManager
+from find import KeywordMatcher
+from undo import UndoRedoManager, SetCellCommand, MacroCommand, BulkChangeCommand
 
 
 def test_addressing():
@@ -49,10 +52,45 @@ def test_model():
     assert model.get_cell_display_value(0, 0) == "Hello"
     assert model.get_cell_display_value(1, 1) == "42"
     
+    # Row and column indexes follow the sparse store
+    assert set(model.sheet.cells_by_row[1]) == {1}
+    model.sheet.delete_cell(2, 2)
+    assert 2 not in model.sheet.cells_by_col
+    model.set_cell_raw(2, 2, "=A1")
+    
+    # Row-major walk starts after a position and wraps around to it
+    walk = [(row, col) for row, col, _ in model.sheet.iter_non_empty_from(1, 1)]
+    assert walk == [(2, 2), (0, 0), (1, 1)]
+    
+    # Display window is row-major with parallel error flags
+    model.set_cell_raw(0, 1, "#N/A")
+    values, errors = model.get_display_window(0, 2, 0, 2)
+    assert values == ["Hello", "#N/A", "", "42"]
+    assert errors == [False, True, False, False]
+    model.set_cell_raw(4, 0, "A long piece of text")
+    assert model.sheet.cells[(4, 0)].display_short == "A long pie"
+    
+    # Batched changes reach observers as one coalesced notification
+    events = []
+    model.add_observer(lambda event_type, **kwargs: events.append((event_type, kwargs)))
+    with model.batched():
+        model.set_cell_raw(3, 0, "1")
+        model.set_cell_raw(3, 1, "2")
+        assert events == []
+    assert events == [("cells_changed", {"cells": [(3, 0), (3, 1)]})]
+    
     # Test serialization
     data = model.to_dict()
     assert "cells" in data
-    assert "0,0" in data["cells"]
+    assert data["cells"]["raws"][data["cells"]["rows"].index(0)] == "Hello"
+    
+    loaded = SpreadsheetModel()
+    loaded.from_dict(data)
+    assert loaded.sheet.cells[(1, 1)].raw == "42"
+    
+    # Legacy per-cell format still loads
+    loaded.from_dict({"cells": {"0,0": {"raw": "Old", "value": "Old"}}})
+    assert loaded.get_cell_display_value(0, 0) == "Old"
     
     print("[OK] Model tests passed")
 
@@ -78,6 +116,11 @@ def test_formulas():
     result = evaluate_formula("=A1+B1", get_cell_value)
     assert result == 30
     
+    # Test precedence and associativity
+    assert evaluate_formula("=1-2-3", get_cell_value) == -4
+    assert evaluate_formula("=2^3^2", get_cell_value) == 512
+    assert evaluate_formula("=1+2*3>6", get_cell_value) is True
+    
     # Test functions
     result = evaluate_formula("=SUM(A1:B1)", get_cell_value)
     assert result == 30
@@ -85,6 +128,16 @@ def test_formulas():
     result = evaluate_formula("=IF(A1>5,\"Yes\",\"No\")", get_cell_value)
     assert result == "Yes"
     
+    # Only the selected IF branch is evaluated
+    result = evaluate_formula("=IF(A1>5,1,1/0)", get_cell_value)
+    assert result == 1
+    
+    # Test constant folding
+    ast = parse_formula("=ROUND(3.14*2,0)+A1")
+    assert isinstance(ast.left, NumberNode) and ast.left.value == 6
+    assert isinstance(parse_formula("=1/0"), BinaryOpNode)
+    assert evaluate_formula("=1/0", get_cell_value) == "#DIV/0!"
+    
     print("[OK] Formula tests passed")
 
 
@@ -112,6 +165,36 @@ def test_calculation_engine():
     assert "A1" in deps
     assert "B1" in deps
     
+    # Loaded formulas are evaluated lazily, precedents first
+    model.set_cell_raw(1, 0, "=C1*2")
+    engine.mark_all_dirty()
+    assert (1, 0) in model.pending_cells
+    assert model.get_cell_display_value(1, 0) == "60.00"
+    assert not model.pending_cells
+    
+    # A changed precedent is never mistaken for the previous value (hash(-1) == hash(-2))
+    model.set_cell_raw(2, 0, "-1")
+    engine.mark_dirty((2, 0))
+    engine.recalculate()
+    model.set_cell_raw(2, 1, "=A3*10")
+    engine.set_cell_formula(2, 1, "=A3*10")
+    assert model.sheet.get_cell(2, 1).value == -10
+    model.set_cell_raw(2, 0, "-2")
+    engine.mark_dirty((2, 0))
+    engine.recalculate()
+    assert model.sheet.get_cell(2, 1).value == -20
+    
+    # Recalculating with unchanged precedents reuses the memoized result
+    formula_cell = model.sheet.get_cell(2, 1)
+    formula_cell._cached_val = "memo"
+    engine.mark_dirty((2, 0))
+    engine.recalculate()
+    assert formula_cell.value == "memo"
+    model.set_cell_raw(2, 0, "-3")
+    engine.mark_dirty((2, 0))
+    engine.recalculate()
+    assert formula_cell.value == -30
+    
     print("[OK] Calculation engine tests passed")
 
 
@@ -130,6 +213,23 @@ def test_storage():
     data = model.to_dict()
     assert "cells" in data
     
+    # Test JSON save/load round trip
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "book.json")
+        assert storage.save_json(filename)
+        assert os.listdir(tmp_dir) == ["book.json"]
+        
+        loaded = SpreadsheetModel()
+        assert StorageManager(loaded).load_json(filename)
+        assert loaded.sheet.cells[(0, 0)].raw == "Test"
+    
+        # Test CSV import: numbers are normalized, near-numbers stay text
+        csv_name = os.path.join(tmp_dir, "data.csv")
+        with open(csv_name, "w", newline="") as f:
+            f.write('007,2.50,"12\n",1e400\n')
+        updates = storage.read_csv_updates(csv_name)
+        assert [raw for _, _, raw in updates] == ["7", "2.5", "12\n", "1e400"]
+    
     # Test CSV export (to string)
     csv_data = storage.get_range_as_csv_string(0, 0, 1, 1)
     assert "Test" in csv_data
@@ -137,6 +237,99 @@ def test_storage():
     print("[OK] Storage tests passed")
 
 
+def test_undo():
+    """Test undo/redo history"""
+    print("Testing undo/redo...")
+    
+    model = SpreadsheetModel()
+    manager = UndoRedoManager()
+    
+    # Quick successive edits to one cell collapse into a single entry
+    model.set_cell_raw(0, 0, "start")
+    for text in ("a", "ab", "abc"):
+        manager.execute_command(SetCellCommand(model, 0, 0, text))
+    assert manager.get_history_size() == (1, 0)
+    
+    assert manager.undo()
+    assert model.sheet.cells[(0, 0)].raw == "start"
+    assert manager.redo()
+    assert model.sheet.cells[(0, 0)].raw == "abc"
+    
+    # An undo in between ends coalescing, so the undone-to state stays in history
+    manager.execute_command(SetCellCommand(model, 4, 0, "1"))
+    manager._last_time -= manager._coalesce_window
+    manager.execute_command(SetCellCommand(model, 4, 0, "2"))
+    assert manager.undo()
+    manager.execute_command(SetCellCommand(model, 4, 0, "3"))
+    assert manager.undo()
+    assert model.sheet.cells[(4, 0)].raw == "1"
+    
+    # A macro of cell edits applies and undoes as one step
+    macro = MacroCommand([SetCellCommand(model, 1, col, str(col)) for col in range(3)], "Fill")
+    assert manager.execute_command(macro)
+    assert model.get_cell_display_value(1, 2) == "2"
+    assert manager.undo()
+    assert (1, 0) not in model.sheet.cells
+    
+    # A bulk change is one entry and undo restores the old cells
+    model.set_cell_raw(5, 0, "old")
+    bulk = BulkChangeCommand(model, [(5, 0, "new"), (5, 1, "added")], "Replace all")
+    assert manager.execute_command(bulk)
+    assert bulk.rect == (5, 0, 5, 1)
+    assert model.get_cell_display_value(5, 1) == "added"
+    assert manager.undo()
+    assert model.sheet.cells[(5, 0)].raw == "old" and (5, 1) not in model.sheet.cells
+    
+    # Commands outside the sheet are refused without raising
+    assert not manager.execute_command(SetCellCommand(model, -1, 0, "bad"))
+    
+    # Observers notified during undo read a consistent history
+    seen = []
+    model.add_observer(lambda event_type, **kwargs: seen.append(manager.get_history_size()))
+    manager.execute_command(SetCellCommand(model, 6, 0, "x"))
+    undo_size, redo_size = manager.get_history_size()
+    assert manager.undo()
+    assert seen and all(sum(sizes) == undo_size + redo_size for sizes in seen)
+    
+    # A read from inside a write returns instead of waiting for the write to end
+    with manager._writing():
+        assert manager.get_history_size() == (undo_size - 1, redo_size + 1)
+    
+    # A command that raises stays in history (here its model has been discarded)
+    discarded = SpreadsheetModel()
+    manager.execute_command(SetCellCommand(discarded, 0, 0, "x"))
+    history = manager.get_history_size()
+    del discarded
+    try:
+        manager.undo()
+        assert False, "expected ReferenceError"
+    except ReferenceError:
+        pass
+    assert manager.get_history_size() == history
+    
+    # Coalesced edits are recycled for later commands
+    manager.execute_command(manager.obtain_set_cell_command(model, 2, 0, "x"))
+    manager.execute_command(manager.obtain_set_cell_command(model, 2, 0, "xy"))
+    command = manager.obtain_set_cell_command(model, 3, 0, "z")
+    assert command.row == 3 and not command.had_cell
+    
+    print("[OK] Undo/redo tests passed")
+
+
+def test_find():
+    """Test literal keyword matching"""
+    print("Testing find...")
+    
+    matcher = KeywordMatcher(["he", "she", "hers"])
+    assert matcher.finditer("ushers") == [(1, 4)]
+    assert matcher.search("xyz") is None
+    
+    matcher = KeywordMatcher(["Apple"], match_case=False)
+    assert matcher.subn("pear", "apple, APPLE pie") == ("pear, pear pie", 2)
+    
+    print("[OK] Find tests passed")
+
+
 def run_all_tests():
     """Run all basic tests"""
     print("Running basic functionality tests...\n")
@@ -147,6 +340,8 @@ def run_all_tests():
         test_formulas()
         test_calculation_engine()
         test_storage()
+        test_undo()
+        test_find()
         
         print("\n[SUCCESS] All tests passed! The spreadsheet core functionality is working correctly.")
         print("\nYou can now run the application with: python main.py")
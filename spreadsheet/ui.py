@@ -3,14 +3,39 @@ Main UI module using tkinter.
 Implements the spreadsheet interface with grid, menus, and dialogs.
 """
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, messagebox, filedialog, simpledialog
 import re
+import time
+import queue
+import threading
 from typing import Optional, Tuple, List, Set, Dict, Any
 
 from model import SpreadsheetModel, address_to_string, parse_address, col_to_letter
 from engine import CalculationEngine
 from storage import StorageManager
-from undo import UndoRedoManager, SetCellCommand, InsertRowCommand, DeleteRowCommand, InsertColumnCommand, DeleteColumnCommand, FormatCellCommand
+from find import KeywordMatcher
+from undo import UndoRedoManager, BulkChangeCommand, InsertRowCommand, DeleteRowCommand, InsertColumnCommand, DeleteColumnCommand, FormatCellCommand
+
+# How often the Tk loop checks for results of background work
+ASYNC_POLL_MS = 50
+
+# Pending formula cells evaluated per idle step after a file is loaded
+WARMUP_BATCH = 500
+
+# Minimum time between status bar updates during rapid navigation or mass operations
+STATUS_INTERVAL_MS = 100
+
+# Literal searches for at least this many words use the Aho-Corasick matcher;
+# fewer words are faster as a regular expression alternation
+KEYWORD_MATCHER_MIN_WORDS = 32
+
+# (row, col) selection movement for each arrow key
+_ARROW_DELTAS = {'Up': (-1, 0), 'Down': (1, 0), 'Left': (0, -1), 'Right': (0, 1)}
+
+# Header labels never change, so build them once at import time
+_COL_LETTERS = tuple(col_to_letter(c) for c in range(256))
+_ROW_LABELS = tuple(str(r + 1) for r in range(1024))
 
 
 class FindReplaceDialog:
@@ -24,6 +49,9 @@ class FindReplaceDialog:
         self.replace_var = tk.StringVar()
         self.regex_var = tk.BooleanVar()
         self.match_case_var = tk.BooleanVar()
+        self.any_word_var = tk.BooleanVar()
+        self._compiled = None  # Compiled search pattern
+        self._compiled_key = None  # (text, regex, match case, any word) it was compiled from
         
     def show(self):
         if self.dialog:
@@ -57,6 +85,7 @@ class FindReplaceDialog:
         
         ttk.Checkbutton(options_frame, text="Regular Expression", variable=self.regex_var).pack(side='left')
         ttk.Checkbutton(options_frame, text="Match Case", variable=self.match_case_var).pack(side='left')
+        ttk.Checkbutton(options_frame, text="Any Word", variable=self.any_word_var).pack(side='left')
         
         # Buttons frame
         buttons_frame = ttk.Frame(self.dialog)
@@ -70,17 +99,103 @@ class FindReplaceDialog:
         find_entry.focus()
         self.dialog.protocol("WM_DELETE_WINDOW", self.close)
     
-    def find_next(self):
-        # Placeholder implementation
-        messagebox.showinfo("Find", "Find functionality not fully implemented")
+    def _compile(self):
+        """Build the search pattern, reusing it while the options are unchanged"""
+        # Many-word literal searches use a KeywordMatcher; it and re.Pattern both
+        # provide search() and subn()
+        key = (self.find_var.get(), self.regex_var.get(), self.match_case_var.get(),
+               self.any_word_var.get())
+        if key != self._compiled_key:
+            pattern, use_regex, match_case, any_word = key
+            flags = 0 if match_case else re.IGNORECASE
+            if use_regex:
+                try:
+                    self._compiled = re.compile(pattern, flags)
+                except re.error as e:
+                    messagebox.showerror("Find", f"Invalid regular expression: {e}")
+                    return None
+            else:
+                keywords = pattern.split() if any_word else [pattern]
+                if not keywords:
+                    return None
+                if len(keywords) >= KEYWORD_MATCHER_MIN_WORDS:
+                    self._compiled = KeywordMatcher(keywords, match_case=match_case)
+                else:
+                    # Longest first, so the alternation prefers the longest match like KeywordMatcher
+                    keywords = sorted(set(keywords), key=len, reverse=True)
+                    self._compiled = re.compile('|'.join(map(re.escape, keywords)), flags)
+            self._compiled_key = key
+        return self._compiled
+    
+    def _replacement(self, pattern) -> str:
+        """Get the replacement text in the form pattern.subn expects"""
+        replacement = self.replace_var.get()
+        if not self.regex_var.get() and isinstance(pattern, re.Pattern):
+            # An escaped literal search: backslashes in the replacement stay literal
+            replacement = replacement.replace('\\', '\\\\')
+        return replacement
+    
+    def find_next(self) -> bool:
+        if not self.find_var.get():
+            return False
+        pattern = self._compile()
+        if pattern is None:
+            return False
+        
+        # Search after the selected cell, wrapping around to the start
+        for row, col, cell in self.ui.model.sheet.iter_non_empty_from(*self.ui.grid.selected_cell):
+            if pattern.search(cell.raw):
+                self.ui.grid.select_cell(row, col)
+                return True
+        
+        messagebox.showinfo("Find", "No matches found")
+        return False
     
     def replace_current(self):
-        # Placeholder implementation
-        messagebox.showinfo("Replace", "Replace functionality not fully implemented")
+        if not self.find_var.get():
+            return
+        pattern = self._compile()
+        if pattern is None:
+            return
+        
+        row, col = self.ui.grid.selected_cell
+        cell = self.ui.model.sheet.cells.get((row, col))
+        if cell is not None and pattern.search(cell.raw):
+            try:
+                new_raw = pattern.subn(self._replacement(pattern), cell.raw)[0]
+            except re.error as e:
+                self._show_replacement_error(e)
+                return
+            self.ui.set_cell_value(row, col, new_raw)
+        self.find_next()
     
     def replace_all(self):
-        # Placeholder implementation
-        messagebox.showinfo("Replace All", "Replace All functionality not fully implemented")
+        if not self.find_var.get():
+            return
+        pattern = self._compile()
+        if pattern is None:
+            return
+        
+        # Collect first so cells are not modified while iterating the sheet
+        replacement = self._replacement(pattern)
+        changes = []
+        try:
+            for row, col, cell in self.ui.model.sheet.iter_non_empty_cells():
+                new_raw, count = pattern.subn(replacement, cell.raw)
+                if count:
+                    changes.append((row, col, new_raw))
+        except re.error as e:
+            self._show_replacement_error(e)
+            return
+        
+        if changes:
+            self.ui.set_cell_values(changes, "Replace all")
+        self.ui.set_status_throttled(f"Replaced in {len(changes)} cell(s)")
+    
+    def _show_replacement_error(self, error: re.error):
+        # In regex mode the replacement is a template: \1 and \g<name> insert groups,
+        # and other backslash escapes (\t, \n, \\) are expanded
+        messagebox.showerror("Replace", f"Invalid replacement: {error}")
     
     def close(self):
         if self.dialog:
@@ -142,9 +257,11 @@ class GoToCellDialog:
 class SpreadsheetGrid(ttk.Frame):
     """Custom spreadsheet grid widget using Canvas"""
     
-    def __init__(self, parent, model: SpreadsheetModel, **kwargs):
+    def __init__(self, parent, model: SpreadsheetModel, on_select=None, on_commit=None, **kwargs):
         super().__init__(parent, **kwargs)
         self.model = model
+        self._on_select = on_select
+        self._on_commit = on_commit
         self.visible_rows = 30
         self.visible_cols = 15
         self.selected_cell = (0, 0)
@@ -155,43 +272,99 @@ class SpreadsheetGrid(ttk.Frame):
         self.editing_cell = None
         self.edit_widget = None
         
+        # Canvas items for the cells currently drawn, filled in by draw_grid
+        self._bg_items: Dict[Tuple[int, int], int] = {}
+        self._text_items: Dict[Tuple[int, int], int] = {}
+        self._shown: Dict[Tuple[int, int], Tuple[str, str, bool]] = {}
+        
+        # Pending repaint state, flushed once per Tk idle cycle
+        self._redraw_pending = False
+        self._full_redraw = False
+        self._refresh_all = False
+        self._dirty_cells: Set[Tuple[int, int]] = set()
+        
         self.setup_grid()
         self.setup_bindings()
     
     def setup_grid(self):
-        # Create canvas with scrollbars
+        self._compute_geometry()
+        
+        # Font objects are created once and shared by every item; keyed by (bold, size)
+        self._fonts = {(bold, 9): tkfont.Font(family='Arial', size=9, weight='bold' if bold else 'normal')
+                       for bold in (False, True)}
+        
+        # Headers live on their own canvases so cell repaints never touch them
+        self.corner_canvas = tk.Canvas(self, width=self.header_width, height=self.header_height,
+                                       bg='lightgray', highlightthickness=0)
+        self.col_header_canvas = tk.Canvas(self, height=self.header_height, bg='white',
+                                           highlightthickness=0)
+        self.row_header_canvas = tk.Canvas(self, width=self.header_width, bg='white',
+                                           highlightthickness=0)
+        
+        # Create cell canvas with scrollbars
         self.canvas = tk.Canvas(self, bg='white', highlightthickness=0)
         
-        v_scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
-        h_scrollbar = ttk.Scrollbar(self, orient='horizontal', command=self.canvas.xview)
+        v_scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._yview)
+        h_scrollbar = ttk.Scrollbar(self, orient='horizontal', command=self._xview)
         
         self.canvas.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
         
         # Grid layout
-        self.canvas.grid(row=0, column=0, sticky='nsew')
-        v_scrollbar.grid(row=0, column=1, sticky='ns')
-        h_scrollbar.grid(row=1, column=0, sticky='ew')
+        self.corner_canvas.grid(row=0, column=0, sticky='nsew')
+        self.col_header_canvas.grid(row=0, column=1, sticky='ew')
+        self.row_header_canvas.grid(row=1, column=0, sticky='ns')
+        self.canvas.grid(row=1, column=1, sticky='nsew')
+        v_scrollbar.grid(row=1, column=2, sticky='ns')
+        h_scrollbar.grid(row=2, column=1, sticky='ew')
         
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(1, weight=1)
         
-        # Set scroll region
+        # Set scroll regions; cell coordinates keep the header offsets so the
+        # header canvases can share the same x/y coordinate space
         total_width = self.header_width + self.visible_cols * self.cell_width
         total_height = self.header_height + self.visible_rows * self.cell_height
-        self.canvas.configure(scrollregion=(0, 0, total_width, total_height))
+        self.canvas.configure(scrollregion=(self.header_width, self.header_height,
+                                            total_width, total_height))
+        self.col_header_canvas.configure(scrollregion=(self.header_width, 0,
+                                                       total_width, self.header_height))
+        self.row_header_canvas.configure(scrollregion=(0, self.header_height,
+                                                       self.header_width, total_height))
+        self._xview('moveto', 0)
+        self._yview('moveto', 0)
+        
+        # One persistent editor, shown over the cell being edited
+        self.edit_var = tk.StringVar()
+        self.edit_widget = tk.Entry(self.canvas, textvariable=self.edit_var,
+                                    font=('Arial', 9), relief='solid', bd=2)
+        self._edit_window = self.canvas.create_window(
+            0, 0, window=self.edit_widget, anchor='nw', width=self.cell_width - 4,
+            height=self.cell_height - 4, state='hidden')
+        self.edit_widget.bind('<Return>', lambda e: self.finish_edit())
+        self.edit_widget.bind('<Escape>', lambda e: self.cancel_edit())
         
-        self.draw_grid()
+        self._draw_static()
+        self._request_redraw()
     
-    def setup_bindings(self):
-        self.canvas.bind('<Button-1>', self.on_cell_click)
-        self.canvas.bind('<Double-Button-1>', self.on_cell_double_click)
-        self.canvas.bind('<Key>', self.on_key_press)
-        self.canvas.focus_set()
-        self.bind_all('<Key>', self.on_key_press)
+    def _compute_geometry(self):
+        """Cache the pixel edges of every grid column and row"""
+        self._col_x = [self.header_width + c * self.cell_width for c in range(self.visible_cols + 1)]
+        self._row_y = [self.header_height + r * self.cell_height for r in range(self.visible_rows + 1)]
     
-    def draw_grid(self):
-        self.canvas.delete('all')
-        
+    def _xview(self, *args):
+        """Scroll cells and column headers together"""
+        self.canvas.xview(*args)
+        self.col_header_canvas.xview(*args)
+        self._request_redraw()
+    
+    def _yview(self, *args):
+        """Scroll cells and row headers together"""
+        self.canvas.yview(*args)
+        self.row_header_canvas.yview(*args)
+        self._request_redraw()
+    
+    def _draw_static(self):
+        """Draw row and column headers once"""
         # Draw column headers
         for col in range(self.visible_cols):
             x1 = self.header_width + col * self.cell_width
@@ -199,9 +372,9 @@ class SpreadsheetGrid(ttk.Frame):
             y1 = 0
             y2 = self.header_height
             
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill='lightgray', outline='black')
-            self.canvas.create_text(x1 + self.cell_width//2, y1 + self.header_height//2, 
-                                  text=col_to_letter(col), font=('Arial', 9, 'bold'))
+            self.col_header_canvas.create_rectangle(x1, y1, x2, y2, fill='lightgray', outline='black')
+            self.col_header_canvas.create_text(x1 + self.cell_width//2, y1 + self.header_height//2, 
+                                               text=_COL_LETTERS[col], font=self._fonts[(True, 9)])
         
         # Draw row headers
         for row in range(self.visible_rows):
@@ -210,45 +383,174 @@ class SpreadsheetGrid(ttk.Frame):
             y1 = self.header_height + row * self.cell_height
             y2 = y1 + self.cell_height
             
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill='lightgray', outline='black')
-            self.canvas.create_text(x1 + self.header_width//2, y1 + self.cell_height//2, 
-                                  text=str(row + 1), font=('Arial', 9, 'bold'))
+            self.row_header_canvas.create_rectangle(x1, y1, x2, y2, fill='lightgray', outline='black')
+            self.row_header_canvas.create_text(x1 + self.header_width//2, y1 + self.cell_height//2, 
+                                               text=_ROW_LABELS[row], font=self._fonts[(True, 9)])
+    
+    def setup_bindings(self):
+        # Keysym dispatch table for on_key_press
+        self._key_handlers = {
+            'Return': self._on_return,
+            'Tab': lambda: self.move_selection(0, 1),
+            'F2': self.start_edit,
+        }
+        for key, delta in _ARROW_DELTAS.items():
+            self._key_handlers[key] = lambda delta=delta: self.move_selection(*delta)
         
-        # Draw cells
-        for row in range(self.visible_rows):
-            for col in range(self.visible_cols):
-                x1 = self.header_width + col * self.cell_width
-                x2 = x1 + self.cell_width
-                y1 = self.header_height + row * self.cell_height
-                y2 = y1 + self.cell_height
+        self.canvas.bind('<Button-1>', self.on_cell_click)
+        self.canvas.bind('<Double-Button-1>', self.on_cell_double_click)
+        self.canvas.bind('<Configure>', lambda e: self._request_redraw())
+        self.canvas.bind('<Key>', self.on_key_press)
+        self.canvas.focus_set()
+        self.bind_all('<Key>', self.on_key_press)
+    
+    def draw_grid(self):
+        """Rebuild all cell canvas items; used for structural changes"""
+        self.canvas.delete('cell')
+        bg_items = self._bg_items = {}
+        text_items = self._text_items = {}
+        shown_map = self._shown = {}
+        
+        # Only the part of the grid inside the scrolled viewport gets items
+        row0, row1, col0, col1 = self._visible_range()
+        
+        # Pull display strings and error flags for the whole window in one call
+        texts, errors = self.model.get_display_window(row0, row1, col0, col1)
+        
+        # Bind everything the loop touches to locals
+        create_rect = self.canvas.create_rectangle
+        create_text = self.canvas.create_text
+        cells = self.model.sheet.cells
+        fonts = self._fonts
+        col_x = self._col_x
+        row_y = self._row_y
+        text_dy = self.cell_height//2
+        selected = self.selected_cell
+        
+        # Draw cells, keeping item ids so later updates can reconfigure them in place
+        i = 0
+        for row in range(row0, row1):
+            y1 = row_y[row]
+            y2 = row_y[row + 1]
+            for col in range(col0, col1):
+                x1 = col_x[col]
+                pos = (row, col)
                 
                 # Cell background
-                fill_color = 'lightblue' if (row, col) == self.selected_cell else 'white'
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=fill_color, outline='gray')
+                fill_color = 'lightblue' if pos == selected else 'white'
+                bg_items[pos] = create_rect(x1, y1, col_x[col + 1], y2, fill=fill_color,
+                                            outline='gray', tags='cell')
                 
-                # Cell content
-                cell_value = self.model.get_cell_display_value(row, col)
-                if cell_value:
-                    # Check for errors
-                    if isinstance(cell_value, str) and cell_value.startswith('#'):
-                        text_color = 'red'
-                    else:
-                        text_color = 'black'
-                    
-                    self.canvas.create_text(x1 + 5, y1 + self.cell_height//2, 
-                                          text=str(cell_value)[:10], anchor='w', 
-                                          font=('Arial', 9), fill=text_color)
+                # Cell content; empty cells get no text item at all. Errors are shown in red
+                text = texts[i]
+                if text:
+                    bold = bool(cells[pos].format.get('bold'))
+                    shown = shown_map[pos] = (text, 'red' if errors[i] else 'black', bold)
+                    text_items[pos] = create_text(x1 + 5, y1 + text_dy, text=text, anchor='w',
+                                                  font=fonts[(bold, 9)], fill=shown[1], tags='cell')
+                else:
+                    shown_map[pos] = (text, 'black', False)
+                i += 1
+    
+    def _visible_range(self) -> Tuple[int, int, int, int]:
+        """Get the half-open (row0, row1, col0, col1) range inside the viewport"""
+        # canvasx/canvasy return floats; keep all pixel math in ints
+        left = int(self.canvas.canvasx(0)) - self.header_width
+        top = int(self.canvas.canvasy(0)) - self.header_height
+        right = int(self.canvas.canvasx(self.canvas.winfo_width())) - self.header_width
+        bottom = int(self.canvas.canvasy(self.canvas.winfo_height())) - self.header_height
+        
+        row0 = max(0, top // self.cell_height)
+        row1 = min(self.visible_rows, bottom // self.cell_height + 1)
+        col0 = max(0, left // self.cell_width)
+        col1 = min(self.visible_cols, right // self.cell_width + 1)
+        return row0, row1, col0, col1
+    
+    def _create_text_item(self, row: int, col: int, shown: Tuple[str, str, bool]):
+        """Create the text item for a non-empty cell"""
+        x = self._col_x[col] + 5
+        y = self._row_y[row] + self.cell_height//2
+        self._text_items[(row, col)] = self.canvas.create_text(
+            x, y, text=shown[0], anchor='w', font=self._fonts[(shown[2], 9)], fill=shown[1],
+            tags='cell')
+    
+    def _cell_text(self, row: int, col: int) -> Tuple[str, str, bool]:
+        """Get the (text, color, bold) shown for a cell"""
+        text = self.model.get_cell_display_short(row, col)
+        if not text:
+            return text, 'black', False
+        
+        # Errors are shown in red
+        text_color = 'red' if text.startswith('#') else 'black'
+        return text, text_color, bool(self.model.sheet.cells[(row, col)].format.get('bold'))
+    
+    def refresh_cell(self, row: int, col: int):
+        """Update a single cell's text item if its content changed"""
+        previous = self._shown.get((row, col))
+        if previous is None:
+            return
+        
+        shown = self._cell_text(row, col)
+        if shown == previous:
+            return
+        
+        self._shown[(row, col)] = shown
+        item = self._text_items.get((row, col))
+        if not shown[0]:
+            if item is not None:
+                self.canvas.delete(self._text_items.pop((row, col)))
+        elif item is None:
+            self._create_text_item(row, col, shown)
+        else:
+            self.canvas.itemconfig(item, text=shown[0], fill=shown[1], font=self._fonts[(shown[2], 9)])
+    
+    def refresh_cells(self):
+        """Update text items for every visible cell whose content changed"""
+        for row, col in self._shown:
+            self.refresh_cell(row, col)
+    
+    def _request_redraw(self):
+        """Schedule a full rebuild of the cell items"""
+        self._full_redraw = True
+        self._schedule_redraw()
+    
+    def _request_refresh(self, cells=None):
+        """Schedule a refresh of the given cells, or of every visible cell"""
+        if cells is None:
+            self._refresh_all = True
+        else:
+            self._dirty_cells.update(cells)
+        self._schedule_redraw()
+    
+    def _schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._do_redraw)
+    
+    def _do_redraw(self):
+        """Apply all repaint requests collected since the last idle cycle"""
+        self._redraw_pending = False
+        if self._full_redraw:
+            self.draw_grid()
+        elif self._refresh_all:
+            self.refresh_cells()
+        else:
+            for row, col in self._dirty_cells:
+                self.refresh_cell(row, col)
+        self._full_redraw = False
+        self._refresh_all = False
+        self._dirty_cells.clear()
     
     def on_cell_click(self, event):
-        # Convert canvas coordinates to cell coordinates
-        canvas_x = self.canvas.canvasx(event.x)
-        canvas_y = self.canvas.canvasy(event.y)
+        # Convert canvas coordinates to integer cell coordinates
+        canvas_x = int(self.canvas.canvasx(event.x))
+        canvas_y = int(self.canvas.canvasy(event.y))
         
         if canvas_x < self.header_width or canvas_y < self.header_height:
             return
         
-        col = int((canvas_x - self.header_width) // self.cell_width)
-        row = int((canvas_y - self.header_height) // self.cell_height)
+        col = (canvas_x - self.header_width) // self.cell_width
+        row = (canvas_y - self.header_height) // self.cell_height
         
         if 0 <= row < self.visible_rows and 0 <= col < self.visible_cols:
             self.select_cell(row, col)
@@ -257,27 +559,31 @@ class SpreadsheetGrid(ttk.Frame):
         self.start_edit()
     
     def on_key_press(self, event):
-        if event.keysym == 'Return':
-            if self.editing_cell:
-                self.finish_edit()
-            else:
-                self.move_selection(1, 0)
-        elif event.keysym == 'Tab':
-            self.move_selection(0, 1)
-        elif event.keysym == 'F2':
-            self.start_edit()
-        elif event.keysym in ['Up', 'Down', 'Left', 'Right']:
-            self.handle_arrow_key(event.keysym)
+        handler = self._key_handlers.get(event.keysym)
+        if handler:
+            handler()
         elif event.char and event.char.isprintable() and not self.editing_cell:
             self.start_edit(event.char)
     
+    def _on_return(self):
+        if self.editing_cell:
+            self.finish_edit()
+        else:
+            self.move_selection(1, 0)
+    
     def select_cell(self, row: int, col: int):
+        previous = self.selected_cell
         self.selected_cell = (row, col)
-        self.draw_grid()
+        
+        # Only the old and new selection backgrounds change
+        if previous in self._bg_items:
+            self.canvas.itemconfig(self._bg_items[previous], fill='white')
+        if (row, col) in self._bg_items:
+            self.canvas.itemconfig(self._bg_items[(row, col)], fill='lightblue')
         
         # Notify parent of selection change
-        if hasattr(self.master, 'on_cell_selected'):
-            self.master.on_cell_selected(row, col)
+        if self._on_select:
+            self._on_select(row, col)
     
     def move_selection(self, row_delta: int, col_delta: int):
         new_row = max(0, min(self.visible_rows - 1, self.selected_cell[0] + row_delta))
@@ -285,14 +591,9 @@ class SpreadsheetGrid(ttk.Frame):
         self.select_cell(new_row, new_col)
     
     def handle_arrow_key(self, key):
-        if key == 'Up':
-            self.move_selection(-1, 0)
-        elif key == 'Down':
-            self.move_selection(1, 0)
-        elif key == 'Left':
-            self.move_selection(0, -1)
-        elif key == 'Right':
-            self.move_selection(0, 1)
+        delta = _ARROW_DELTAS.get(key)
+        if delta:
+            self.move_selection(*delta)
     
     def start_edit(self, initial_char: str = ""):
         if self.editing_cell:
@@ -306,38 +607,32 @@ class SpreadsheetGrid(ttk.Frame):
         current_value = cell.raw if initial_char == "" else initial_char
         
         # Calculate edit widget position
-        x = self.header_width + col * self.cell_width
-        y = self.header_height + row * self.cell_height
-        
-        # Create edit widget
-        self.edit_var = tk.StringVar(value=current_value)
-        self.edit_widget = tk.Entry(self.canvas, textvariable=self.edit_var, 
-                                   font=('Arial', 9), relief='solid', bd=2)
-        self.canvas.create_window(x + 2, y + 2, window=self.edit_widget, 
-                                anchor='nw', width=self.cell_width - 4, 
-                                height=self.cell_height - 4)
+        x = self._col_x[col]
+        y = self._row_y[row]
+        
+        # Move the persistent edit widget over the cell and show it
+        self.edit_var.set(current_value)
+        self.canvas.coords(self._edit_window, x + 2, y + 2)
+        self.canvas.itemconfig(self._edit_window, state='normal')
+        self.edit_widget.icursor('end')
         self.edit_widget.focus()
-        self.edit_widget.bind('<Return>', lambda e: self.finish_edit())
-        self.edit_widget.bind('<Escape>', lambda e: self.cancel_edit())
     
     def finish_edit(self):
-        if not self.editing_cell or not self.edit_widget:
+        if not self.editing_cell:
             return
         
         row, col = self.editing_cell
         new_value = self.edit_var.get()
         
         # Update model through parent
-        if hasattr(self.master, 'set_cell_value'):
-            self.master.set_cell_value(row, col, new_value)
+        if self._on_commit:
+            self._on_commit(row, col, new_value)
         
         self.cancel_edit()
-        self.draw_grid()
+        self._request_refresh()
     
     def cancel_edit(self):
-        if self.edit_widget:
-            self.edit_widget.destroy()
-            self.edit_widget = None
+        self.canvas.itemconfig(self._edit_window, state='hidden')
         self.editing_cell = None
         self.canvas.focus_set()
 
@@ -358,6 +653,8 @@ class SpreadsheetUI:
         
         # UI state
         self.clipboard_data = ""
+        self._status_pending = None  # Latest throttled status message not yet shown
+        self._status_shown_at = 0.0  # time.monotonic() of the last status update
         
         # Setup UI
         self.setup_menu()
@@ -460,7 +757,8 @@ class SpreadsheetUI:
         self.formula_entry.bind('<Return>', self.on_formula_enter)
     
     def setup_grid(self):
-        self.grid = SpreadsheetGrid(self.root, self.model)
+        self.grid = SpreadsheetGrid(self.root, self.model, on_select=self.on_cell_selected,
+                                    on_commit=self.set_cell_value)
         self.grid.pack(fill='both', expand=True, padx=5, pady=5)
     
     def setup_status_bar(self):
@@ -468,6 +766,22 @@ class SpreadsheetUI:
         status_bar = ttk.Label(self.root, textvariable=self.status_var, relief='sunken')
         status_bar.pack(fill='x', side='bottom')
     
+    def set_status_throttled(self, message: str):
+        """Update the status bar at most once per STATUS_INTERVAL_MS, keeping the newest message"""
+        pending = self._status_pending is not None
+        self._status_pending = message
+        if pending:
+            return
+        
+        wait_ms = int((self._status_shown_at + STATUS_INTERVAL_MS / 1000 - time.monotonic()) * 1000)
+        self.root.after(max(0, wait_ms), self._flush_status)
+    
+    def _flush_status(self):
+        if self._status_pending is not None:
+            self.status_var.set(self._status_pending)
+            self._status_pending = None
+            self._status_shown_at = time.monotonic()
+    
     def setup_bindings(self):
         self.root.bind('<Control-n>', lambda e: self.new_file())
         self.root.bind('<Control-o>', lambda e: self.open_file())
@@ -487,7 +801,7 @@ class SpreadsheetUI:
         
         # Update status bar
         addr = address_to_string(row, col)
-        self.status_var.set(f"Cell: {addr}")
+        self.set_status_throttled(f"Cell: {addr}")
     
     def on_formula_enter(self, event=None):
         """Called when formula is entered in formula bar"""
@@ -497,24 +811,47 @@ class SpreadsheetUI:
     
     def set_cell_value(self, row: int, col: int, value: str):
         """Set cell value through undo system"""
-        command = SetCellCommand(self.model, row, col, value)
-        self.undo_manager.execute_command(command)
+        # The edit and its recalculation reach observers as one notification
+        with self.model.batched():
+            command = self.undo_manager.obtain_set_cell_command(self.model, row, col, value)
+            self.undo_manager.execute_command(command)
+            
+            # Update calculation engine
+            if value.startswith('='):
+                self.engine.set_cell_formula(row, col, value)
+            else:
+                self.engine.mark_dirty((row, col))
+                self.engine.recalculate()
         
-        # Update calculation engine
-        if value.startswith('='):
-            self.engine.set_cell_formula(row, col, value)
-        else:
-            self.engine.mark_dirty((row, col))
+        # Recalculation may have changed dependent cells too
+        self.grid._request_refresh()
+    
+    def set_cell_values(self, updates: List[Tuple[int, int, str]], description: str):
+        """Set many (row, col, value) cells through the undo system as one step"""
+        with self.model.batched():
+            self.undo_manager.execute_command(BulkChangeCommand(self.model, updates, description))
+            
+            # Update calculation engine
+            for row, col, value in updates:
+                if value.startswith('='):
+                    self.engine.set_cell_formula(row, col, value)
+                else:
+                    self.engine.mark_dirty((row, col))
             self.engine.recalculate()
+        
+        self.grid._request_refresh()
     
     def on_model_changed(self, event_type: str, **kwargs):
         """Handle model change events"""
+        # Repaints are coalesced so a burst of events costs one redraw
         if event_type == 'cell_changed':
-            self.grid.draw_grid()
+            self.grid._request_refresh([(kwargs['row'], kwargs['col'])])
+        elif event_type == 'cells_changed':
+            self.grid._request_refresh()
         elif event_type == 'structure_changed':
-            self.grid.draw_grid()
+            self.grid._request_redraw()
         elif event_type == 'model_loaded':
-            self.grid.draw_grid()
+            self.grid._request_redraw()
     
     # File operations
     def new_file(self):
@@ -528,7 +865,7 @@ class SpreadsheetUI:
         self.model.add_observer(self.on_model_changed)
         self.undo_manager.clear_history()
         self.grid.model = self.model
-        self.grid.draw_grid()
+        self.grid._request_redraw()
         self.root.title("Spreadsheet Lite - Untitled")
     
     def open_file(self):
@@ -538,9 +875,11 @@ class SpreadsheetUI:
         )
         if filename:
             if self.storage.load_json(filename):
+                # Formulas are evaluated as they are drawn, the rest in idle time
                 self.engine = CalculationEngine(self.model)
-                self.engine.recalculate_all()
-                self.grid.draw_grid()
+                self.engine.mark_all_dirty()
+                self.grid._request_redraw()
+                self._schedule_warmup()
                 self.root.title(f"Spreadsheet Lite - {filename}")
             else:
                 messagebox.showerror("Error", "Failed to open file")
@@ -572,12 +911,22 @@ class SpreadsheetUI:
             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
         )
         if filename:
-            if self.storage.import_csv(filename):
-                self.engine.recalculate_all()
-                self.grid.draw_grid()
-                messagebox.showinfo("Success", "CSV imported successfully")
-            else:
-                messagebox.showerror("Error", "Failed to import CSV")
+            # Parse on a worker thread; the model is only updated back on the Tk thread
+            self.status_var.set("Importing...")
+            storage = self.storage
+            self._run_async(lambda: storage.read_csv_updates(filename), self._after_import)
+    
+    def _after_import(self, updates):
+        self.status_var.set("Ready")
+        if updates is None:
+            messagebox.showerror("Error", "Failed to import CSV")
+            return
+        
+        self.model.set_cells_bulk(updates)
+        self.engine.mark_all_dirty()
+        self.grid._request_refresh()
+        self._schedule_warmup()
+        messagebox.showinfo("Success", "CSV imported successfully")
     
     def export_csv(self):
         filename = filedialog.asksaveasfilename(
@@ -591,14 +940,47 @@ class SpreadsheetUI:
             else:
                 messagebox.showerror("Error", "Failed to export CSV")
     
+    def _schedule_warmup(self):
+        """Evaluate remaining pending formulas in small steps after the first paint"""
+        engine = self.engine
+        
+        def step():
+            if engine is self.engine and engine.evaluate_pending(WARMUP_BATCH):
+                self.root.after(1, step)
+        
+        self.root.after_idle(step)
+    
+    def _run_async(self, fn, on_done):
+        """Run fn on a daemon thread and pass its result (None if it raised) to on_done on the Tk thread"""
+        results = queue.Queue()
+        
+        def worker():
+            # Always put a result, or _poll_queue would keep polling forever
+            try:
+                result = fn()
+            except Exception as e:
+                print(f"Error in background task: {e}")
+                result = None
+            results.put(result)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(ASYNC_POLL_MS, self._poll_queue, results, on_done)
+    
+    def _poll_queue(self, results: queue.Queue, on_done):
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            self.root.after(ASYNC_POLL_MS, self._poll_queue, results, on_done)
+            return
+        on_done(result)
+    
     # Edit operations
+    # Commands notify the model's observers themselves, which repaints what they touched
     def undo(self):
-        if self.undo_manager.undo():
-            self.grid.draw_grid()
+        self.undo_manager.undo()
     
     def redo(self):
-        if self.undo_manager.redo():
-            self.grid.draw_grid()
+        self.undo_manager.redo()
     
     def copy(self):
         row, col = self.grid.selected_cell
@@ -658,7 +1040,7 @@ class SpreadsheetUI:
     # Tools
     def recalculate_all(self):
         self.engine.recalculate_all()
-        self.grid.draw_grid()
+        self.grid._request_refresh()
     
     def go_to_cell(self):
         dialog = GoToCellDialog(self.root, self)
@@ -2,14 +2,34 @@
 Undo/Redo system with command pattern.
 Supports multi-step operations and command stacking.
 """
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Deque, Callable
 from abc import ABC, abstractmethod
-from model import SpreadsheetModel
+from collections import deque
+from contextlib import contextmanager, nullcontext
+import threading
+import time
+import weakref
+from model import SpreadsheetModel, address_to_string, col_to_letter, KEY_SHIFT
+
+# Extracts the column from a packed cell key (see model.cell_key)
+_COL_MASK = (1 << KEY_SHIFT) - 1
+
+
+def _valid_index(*indices: int) -> bool:
+    """Check that row/column indices address the sheet (it has no upper bound)"""
+    for index in indices:
+        if index < 0:
+            return False
+    return True
 
 
 class Command(ABC):
     """Abstract base class for undoable commands"""
     
+    # Subclasses hold the model through weakref.proxy; the application owns the
+    # strong reference, so history entries stay out of the model's reference graph
+    __slots__ = ()
+    
     @abstractmethod
     def execute(self) -> bool:
         """Execute the command"""
@@ -29,257 +49,400 @@ class Command(ABC):
 class SetCellCommand(Command):
     """Command to set cell content"""
     
+    __slots__ = ('model', 'row', 'col', 'new_raw', 'new_value', 'old_raw', 'old_value',
+                 'old_format', 'had_cell', '_description')
+    
     def __init__(self, model: SpreadsheetModel, row: int, col: int, new_raw: str, new_value: Any = None):
-        self.model = model
+        self.reset(model, row, col, new_raw, new_value)
+    
+    @classmethod
+    def obtain(cls, pool: List['SetCellCommand'], model: SpreadsheetModel, row: int, col: int,
+               new_raw: str, new_value: Any = None) -> 'SetCellCommand':
+        """Get a command from pool, reinitialized, or a new one if the pool is empty"""
+        if pool:
+            command = pool.pop()
+            command.reset(model, row, col, new_raw, new_value)
+            return command
+        return cls(model, row, col, new_raw, new_value)
+    
+    def reset(self, model: SpreadsheetModel, row: int, col: int, new_raw: str, new_value: Any = None):
+        """(Re)initialize all fields, snapshotting the cell's current state"""
+        self.model = weakref.proxy(model)
         self.row = row
         self.col = col
         self.new_raw = new_raw
         self.new_value = new_value
+        self._description = f"Set {address_to_string(row, col)}"
         
         # Store old values for undo
         if (row, col) in model.sheet.cells:
             old_cell = model.sheet.cells[(row, col)]
             self.old_raw = old_cell.raw
             self.old_value = old_cell.value
-            self.old_format = old_cell.format.copy()
+            self.old_format = old_cell.format.copy() if old_cell.format else None  # None for no format
             self.had_cell = True
         else:
             self.old_raw = ""
             self.old_value = ""
-            self.old_format = {}
+            self.old_format = None
             self.had_cell = False
     
     def execute(self) -> bool:
         """Execute the set cell command"""
-        try:
-            self.model.set_cell_raw(self.row, self.col, self.new_raw)
-            return True
-        except Exception:
+        if not _valid_index(self.row, self.col):
             return False
+        self.model.set_cell_raw(self.row, self.col, self.new_raw)
+        return True
     
     def undo(self) -> bool:
         """Undo the set cell command"""
-        try:
-            if self.had_cell:
-                self.model.sheet.set_cell(self.row, self.col, self.old_raw, self.old_value, self.old_format)
-            else:
-                self.model.sheet.delete_cell(self.row, self.col)
-            
-            self.model.notify_observers('cell_changed', row=self.row, col=self.col)
-            return True
-        except Exception:
+        if not _valid_index(self.row, self.col):
             return False
+        self._restore(self.model.sheet)
+        self.model.notify_observers('cell_changed', row=self.row, col=self.col)
+        return True
+    
+    def _restore(self, sheet):
+        """Put the old cell state back without notifying observers"""
+        if self.had_cell:
+            sheet.set_cell(self.row, self.col, self.old_raw, self.old_value, self.old_format)
+        else:
+            sheet.delete_cell(self.row, self.col)
     
     def get_description(self) -> str:
-        from model import address_to_string
-        return f"Set {address_to_string(self.row, self.col)}"
+        return self._description
 
 
 class InsertRowCommand(Command):
     """Command to insert a row"""
     
+    __slots__ = ('model', 'row', '_description')
+    
     def __init__(self, model: SpreadsheetModel, row: int):
-        self.model = model
+        self.model = weakref.proxy(model)
         self.row = row
+        self._description = f"Insert row {row + 1}"
     
     def execute(self) -> bool:
-        try:
-            self.model.sheet.insert_row(self.row)
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.row):
             return False
+        self.model.sheet.insert_row(self.row)
+        self.model.notify_observers('structure_changed')
+        return True
     
     def undo(self) -> bool:
-        try:
-            self.model.sheet.delete_row(self.row)
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.row):
             return False
+        self.model.sheet.delete_row(self.row)
+        self.model.notify_observers('structure_changed')
+        return True
     
     def get_description(self) -> str:
-        return f"Insert row {self.row + 1}"
+        return self._description
 
 
 class DeleteRowCommand(Command):
     """Command to delete a row"""
     
+    __slots__ = ('model', 'row', 'deleted_cells', '_snapshot_taken', '_description')
+    
     def __init__(self, model: SpreadsheetModel, row: int):
-        self.model = model
+        self.model = weakref.proxy(model)
         self.row = row
+        self._description = f"Delete row {row + 1}"
         
-        # Store cells that will be deleted
-        self.deleted_cells = {}
-        for (r, c), cell in model.sheet.cells.items():
-            if r == row:
-                self.deleted_cells[(r, c)] = {
-                    'raw': cell.raw,
-                    'value': cell.value,
-                    'format': cell.format.copy()
-                }
+        # (raw, value, format) for cells that will be deleted, by packed cell key;
+        # None for no format. Filled on first execute, so commands that never run cost nothing
+        self.deleted_cells: Dict[int, Tuple[str, Any, Optional[Dict]]] = {}
+        self._snapshot_taken = False
+    
+    def _take_snapshot(self):
+        cells = self.model.sheet.cells_by_row.get(self.row)
+        if cells:
+            row_bits = self.row << KEY_SHIFT
+            for c, cell in cells.items():
+                self.deleted_cells[row_bits | c] = (cell.raw, cell.value, cell.format.copy() if cell.format else None)
+        self._snapshot_taken = True
     
     def execute(self) -> bool:
-        try:
-            self.model.sheet.delete_row(self.row)
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.row):
             return False
+        # Redo after undo sees the same cells again, so one snapshot is enough
+        if not self._snapshot_taken:
+            self._take_snapshot()
+        self.model.sheet.delete_row(self.row)
+        self.model.notify_observers('structure_changed')
+        return True
     
     def undo(self) -> bool:
-        try:
-            self.model.sheet.insert_row(self.row)
-            
-            # Restore deleted cells
-            for (r, c), cell_data in self.deleted_cells.items():
-                self.model.sheet.set_cell(r, c, cell_data['raw'], cell_data['value'], cell_data['format'])
-            
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.row):
             return False
+        self.model.sheet.insert_row(self.row)
+        
+        # Restore deleted cells
+        sheet = self.model.sheet
+        for key, (raw, value, format_dict) in self.deleted_cells.items():
+            sheet.set_cell(key >> KEY_SHIFT, key & _COL_MASK, raw, value, format_dict)
+        
+        self.model.notify_observers('structure_changed')
+        return True
     
     def get_description(self) -> str:
-        return f"Delete row {self.row + 1}"
+        return self._description
 
 
 class InsertColumnCommand(Command):
     """Command to insert a column"""
     
+    __slots__ = ('model', 'col', '_description')
+    
     def __init__(self, model: SpreadsheetModel, col: int):
-        self.model = model
+        self.model = weakref.proxy(model)
         self.col = col
+        self._description = f"Insert column {col_to_letter(col)}"
     
     def execute(self) -> bool:
-        try:
-            self.model.sheet.insert_column(self.col)
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.col):
             return False
+        self.model.sheet.insert_column(self.col)
+        self.model.notify_observers('structure_changed')
+        return True
     
     def undo(self) -> bool:
-        try:
-            self.model.sheet.delete_column(self.col)
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.col):
             return False
+        self.model.sheet.delete_column(self.col)
+        self.model.notify_observers('structure_changed')
+        return True
     
     def get_description(self) -> str:
-        from model import col_to_letter
-        return f"Insert column {col_to_letter(self.col)}"
+        return self._description
 
 
 class DeleteColumnCommand(Command):
     """Command to delete a column"""
     
+    __slots__ = ('model', 'col', 'deleted_cells', '_snapshot_taken', '_description')
+    
     def __init__(self, model: SpreadsheetModel, col: int):
-        self.model = model
+        self.model = weakref.proxy(model)
         self.col = col
+        self._description = f"Delete column {col_to_letter(col)}"
         
-        # Store cells that will be deleted
-        self.deleted_cells = {}
-        for (r, c), cell in model.sheet.cells.items():
-            if c == col:
-                self.deleted_cells[(r, c)] = {
-                    'raw': cell.raw,
-                    'value': cell.value,
-                    'format': cell.format.copy()
-                }
+        # (raw, value, format) for cells that will be deleted, by packed cell key;
+        # None for no format. Filled on first execute, so commands that never run cost nothing
+        self.deleted_cells: Dict[int, Tuple[str, Any, Optional[Dict]]] = {}
+        self._snapshot_taken = False
+    
+    def _take_snapshot(self):
+        col = self.col
+        cells = self.model.sheet.cells_by_col.get(col)
+        if cells:
+            for r, cell in cells.items():
+                self.deleted_cells[(r << KEY_SHIFT) | col] = (cell.raw, cell.value, cell.format.copy() if cell.format else None)
+        self._snapshot_taken = True
     
     def execute(self) -> bool:
-        try:
-            self.model.sheet.delete_column(self.col)
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.col):
             return False
+        # Redo after undo sees the same cells again, so one snapshot is enough
+        if not self._snapshot_taken:
+            self._take_snapshot()
+        self.model.sheet.delete_column(self.col)
+        self.model.notify_observers('structure_changed')
+        return True
     
     def undo(self) -> bool:
-        try:
-            self.model.sheet.insert_column(self.col)
-            
-            # Restore deleted cells
-            for (r, c), cell_data in self.deleted_cells.items():
-                self.model.sheet.set_cell(r, c, cell_data['raw'], cell_data['value'], cell_data['format'])
-            
-            self.model.notify_observers('structure_changed')
-            return True
-        except Exception:
+        if not _valid_index(self.col):
             return False
+        self.model.sheet.insert_column(self.col)
+        
+        # Restore deleted cells
+        sheet = self.model.sheet
+        for key, (raw, value, format_dict) in self.deleted_cells.items():
+            sheet.set_cell(key >> KEY_SHIFT, key & _COL_MASK, raw, value, format_dict)
+        
+        self.model.notify_observers('structure_changed')
+        return True
     
     def get_description(self) -> str:
-        from model import col_to_letter
-        return f"Delete column {col_to_letter(self.col)}"
+        return self._description
 
 
 class FormatCellCommand(Command):
     """Command to format a cell"""
     
+    __slots__ = ('model', 'row', 'col', 'format_changes', 'old_format', '_description')
+    
     def __init__(self, model: SpreadsheetModel, row: int, col: int, format_changes: Dict[str, Any]):
-        self.model = model
+        self.model = weakref.proxy(model)
         self.row = row
         self.col = col
         self.format_changes = format_changes
+        self._description = f"Format {address_to_string(row, col)}"
         
         # Store old format for undo
         cell = model.sheet.get_cell(row, col)
-        self.old_format = cell.format.copy()
+        self.old_format = cell.format.copy() if cell.format else None  # None for no format
     
     def execute(self) -> bool:
-        try:
-            cell = self.model.sheet.get_cell(self.row, self.col)
-            cell.format.update(self.format_changes)
-            self.model.notify_observers('cell_changed', row=self.row, col=self.col)
-            return True
-        except Exception:
+        if not _valid_index(self.row, self.col):
             return False
+        cell = self.model.sheet.get_cell(self.row, self.col)
+        cell.update_format(self.format_changes)
+        self.model.notify_observers('cell_changed', row=self.row, col=self.col)
+        return True
     
     def undo(self) -> bool:
-        try:
-            cell = self.model.sheet.get_cell(self.row, self.col)
-            cell.format = self.old_format
-            self.model.notify_observers('cell_changed', row=self.row, col=self.col)
-            return True
-        except Exception:
+        if not _valid_index(self.row, self.col):
+            return False
+        cell = self.model.sheet.get_cell(self.row, self.col)
+        cell.format = {} if self.old_format is None else self.old_format
+        self.model.notify_observers('cell_changed', row=self.row, col=self.col)
+        return True
+    
+    def get_description(self) -> str:
+        return self._description
+
+
+class BulkChangeCommand(Command):
+    """Command that sets many cells as one undo entry, keeping a snapshot of the old cells"""
+    
+    __slots__ = ('model', 'updates', 'rect', 'old_cells', '_snapshot_taken', 'description')
+    
+    def __init__(self, model: SpreadsheetModel, updates: List[Tuple[int, int, str]], description: str):
+        self.model = weakref.proxy(model)
+        self.updates = tuple(updates)
+        self.description = description
+        
+        # Bounding (min_row, min_col, max_row, max_col) of the change, None when empty
+        if self.updates:
+            rows = [row for row, _, _ in self.updates]
+            cols = [col for _, col, _ in self.updates]
+            self.rect: Optional[Tuple[int, int, int, int]] = (min(rows), min(cols), max(rows), max(cols))
+        else:
+            self.rect = None
+        
+        # Old (raw, value, format) per update, or None for an empty cell; taken on first execute
+        self.old_cells: Tuple[Optional[Tuple[str, Any, Optional[Dict]]], ...] = ()
+        self._snapshot_taken = False
+    
+    def _take_snapshot(self):
+        cells = self.model.sheet.cells
+        snapshot = []
+        for row, col, _ in self.updates:
+            cell = cells.get((row, col))
+            if cell is None:
+                snapshot.append(None)
+            else:
+                snapshot.append((cell.raw, cell.value, cell.format.copy() if cell.format else None))
+        self.old_cells = tuple(snapshot)
+        self._snapshot_taken = True
+    
+    def execute(self) -> bool:
+        if self.rect is None or not _valid_index(self.rect[0], self.rect[1]):
+            return False
+        if not self._snapshot_taken:
+            self._take_snapshot()
+        self.model.set_cells_bulk(self.updates)
+        return True
+    
+    def undo(self) -> bool:
+        if not self._snapshot_taken:
             return False
+        
+        # Reversed, so a cell listed twice ends with its first snapshot
+        sheet = self.model.sheet
+        for (row, col, _), old in zip(reversed(self.updates), reversed(self.old_cells)):
+            if old is None:
+                sheet.delete_cell(row, col)
+            else:
+                sheet.set_cell(row, col, *old)
+        self.model.notify_observers('cells_changed', cells=[(row, col) for row, col, _ in self.updates])
+        return True
     
     def get_description(self) -> str:
-        from model import address_to_string
-        return f"Format {address_to_string(self.row, self.col)}"
+        return self.description
 
 
 class MacroCommand(Command):
     """Command that groups multiple commands together"""
     
+    __slots__ = ('commands', 'description', 'model', '_set_cells_only', '_execs', '_undos')
+    
     def __init__(self, commands: List[Command], description: str):
-        self.commands = commands
+        self.commands = tuple(commands)
         self.description = description
+        
+        # Child commands act on one model; batch their notifications through it
+        self.model = next((command.model for command in self.commands
+                           if getattr(command, 'model', None) is not None), None)
+        
+        # Macros made only of cell edits take a direct bulk path
+        self._set_cells_only = bool(self.commands) and all(
+            type(command) is SetCellCommand for command in self.commands)
+        
+        # Other macros bind child methods once, so playback skips per-call method lookup
+        if self._set_cells_only:
+            self._execs = self._undos = ()
+        else:
+            self._execs = tuple(command.execute for command in self.commands)
+            self._undos = tuple(command.undo for command in self.commands)
+    
+    def _batched(self):
+        return self.model.batched() if self.model is not None else nullcontext()
     
     def execute(self) -> bool:
         """Execute all commands in order"""
-        executed = []
+        if self._set_cells_only:
+            return self._execute_set_cells()
         
-        for command in self.commands:
-            if command.execute():
-                executed.append(command)
-            else:
-                # Rollback executed commands
-                for cmd in reversed(executed):
-                    cmd.undo()
-                return False
+        with self._batched():
+            undos = self._undos
+            for i, execute in enumerate(self._execs):
+                if not execute():
+                    # Rollback the commands before the failed one
+                    for undo in reversed(undos[:i]):
+                        undo()
+                    return False
         
         return True
     
     def undo(self) -> bool:
         """Undo all commands in reverse order"""
-        for command in reversed(self.commands):
-            if not command.undo():
+        if self._set_cells_only:
+            return self._undo_set_cells()
+        
+        with self._batched():
+            for undo in reversed(self._undos):
+                if not undo():
+                    return False
+        return True
+    
+    def _valid_cells(self) -> bool:
+        for command in self.commands:
+            if not _valid_index(command.row, command.col):
                 return False
         return True
     
+    def _execute_set_cells(self) -> bool:
+        """Apply every cell edit in one bulk model update"""
+        # Checked up front so a bad child never leaves the bulk update half applied
+        if not self._valid_cells():
+            return False
+        self.model.set_cells_bulk([(c.row, c.col, c.new_raw) for c in self.commands])
+        return True
+    
+    def _undo_set_cells(self) -> bool:
+        """Restore every edited cell, then notify observers once"""
+        if not self._valid_cells():
+            return False
+        sheet = self.model.sheet
+        for command in reversed(self.commands):
+            command._restore(sheet)
+        self.model.notify_observers('cells_changed', cells=[(c.row, c.col) for c in self.commands])
+        return True
+    
     def get_description(self) -> str:
         return self.description
 
@@ -288,25 +451,95 @@ class UndoRedoManager:
     """Manages undo/redo operations"""
     
     def __init__(self, max_history: int = 100):
-        self.undo_stack: List[Command] = []
-        self.redo_stack: List[Command] = []
+        # The bounded deques drop the oldest command in O(1) once history is full
+        self.undo_stack: Deque[Command] = deque(maxlen=max_history)
+        self.redo_stack: Deque[Command] = deque(maxlen=max_history)
         self.max_history = max_history
+        self._last_time = 0.0  # time.monotonic() of the last executed command
+        self._last_command: Optional[Command] = None  # Top entry if it was just executed; None after undo/redo
+        self._cmd_pool: List[SetCellCommand] = []  # Recycled commands for obtain_set_cell_command
+        self._coalesce_window = 1.0  # Seconds within which edits to one cell merge
+        
+        # Only the UI thread mutates the stacks. The version is odd while it does,
+        # so readers on other threads can detect and retry a torn read without a lock
+        self._version = 0
+        self._writer: Optional[int] = None  # Thread ident inside _writing, if any
+    
+    @contextmanager
+    def _writing(self):
+        """Bracket a mutation of the stacks"""
+        self._writer = threading.get_ident()
+        self._version += 1
+        try:
+            yield
+        finally:
+            self._version += 1
+            self._writer = None
+    
+    def _read(self, read: Callable[[], Any]) -> Any:
+        """Run read() against a consistent state of the stacks, retrying if a write overlapped"""
+        while True:
+            version = self._version
+            if version & 1 and self._writer == threading.get_ident():
+                # Re-entrant read from the writing thread; waiting would never end
+                return read()
+            if not version & 1:
+                try:
+                    result = read()
+                except IndexError:
+                    result = None  # A stack was emptied mid-read; the version check retries
+                if self._version == version:
+                    return result
+            time.sleep(0)
     
     def execute_command(self, command: Command) -> bool:
         """Execute a command and add it to undo stack"""
         if command.execute():
-            self.undo_stack.append(command)
-            
-            # Limit history size
-            if len(self.undo_stack) > self.max_history:
-                self.undo_stack.pop(0)
-            
-            # Clear redo stack when new command is executed
-            self.redo_stack.clear()
+            with self._writing():
+                now = time.monotonic()
+                if self._can_coalesce(command, now):
+                    # Fold into the previous edit of the same cell; its old state is kept
+                    top = self.undo_stack[-1]
+                    top.new_raw = command.new_raw
+                    top.new_value = command.new_value
+                    self._recycle(command)
+                else:
+                    # A full deque drops its oldest entry on append
+                    evicted = self.undo_stack[0] if len(self.undo_stack) == self.max_history else None
+                    self.undo_stack.append(command)
+                    if evicted is not None:
+                        self._recycle(evicted)
+                    self._last_command = command
+                self._last_time = now
+                
+                # Clear redo stack when new command is executed, keeping its edits for reuse
+                for undone in self.redo_stack:
+                    self._recycle(undone)
+                self.redo_stack.clear()
             
             return True
         return False
     
+    def obtain_set_cell_command(self, model: SpreadsheetModel, row: int, col: int,
+                                new_raw: str) -> SetCellCommand:
+        """Get a SetCellCommand, reusing one dropped from history when available"""
+        return SetCellCommand.obtain(self._cmd_pool, model, row, col, new_raw)
+    
+    def _recycle(self, command: Command):
+        """Return a command that left the history to the pool"""
+        if type(command) is SetCellCommand and len(self._cmd_pool) < self.max_history:
+            self._cmd_pool.append(command)
+    
+    def _can_coalesce(self, command: Command, now: float) -> bool:
+        """Check whether command repeats an edit to the cell on top of the undo stack"""
+        if not isinstance(command, SetCellCommand) or not self.undo_stack:
+            return False
+        # Only the entry just executed may absorb edits; an undo or redo in between ends the run
+        top = self.undo_stack[-1]
+        return (top is self._last_command and isinstance(top, SetCellCommand) and
+                top.row == command.row and top.col == command.col and
+                now - self._last_time < self._coalesce_window)
+    
     def can_undo(self) -> bool:
         """Check if undo is possible"""
         return len(self.undo_stack) > 0
@@ -320,46 +553,49 @@ class UndoRedoManager:
         if not self.can_undo():
             return False
         
-        command = self.undo_stack.pop()
-        if command.undo():
-            self.redo_stack.append(command)
-            return True
-        else:
-            # If undo fails, put command back
-            self.undo_stack.append(command)
+        self._last_command = None
+        # The command stays on top while it runs, outside the write bracket, so observers it
+        # notifies can read history; if it fails or raises, nothing has moved
+        command = self.undo_stack[-1]
+        if not command.undo():
             return False
+        with self._writing():
+            self.undo_stack.pop()
+            self.redo_stack.append(command)
+        return True
     
     def redo(self) -> bool:
         """Redo the last undone command"""
         if not self.can_redo():
             return False
         
-        command = self.redo_stack.pop()
-        if command.execute():
-            self.undo_stack.append(command)
-            return True
-        else:
-            # If redo fails, put command back
-            self.redo_stack.append(command)
+        self._last_command = None
+        # As in undo, the command runs while still on top of its stack
+        command = self.redo_stack[-1]
+        if not command.execute():
             return False
+        with self._writing():
+            self.redo_stack.pop()
+            self.undo_stack.append(command)
+        return True
     
     def get_undo_description(self) -> Optional[str]:
         """Get description of command that would be undone"""
-        if self.can_undo():
-            return self.undo_stack[-1].get_description()
-        return None
+        stack = self.undo_stack
+        return self._read(lambda: stack[-1].get_description() if stack else None)
     
     def get_redo_description(self) -> Optional[str]:
         """Get description of command that would be redone"""
-        if self.can_redo():
-            return self.redo_stack[-1].get_description()
-        return None
+        stack = self.redo_stack
+        return self._read(lambda: stack[-1].get_description() if stack else None)
     
     def clear_history(self):
         """Clear all undo/redo history"""
-        self.undo_stack.clear()
-        self.redo_stack.clear()
+        self._last_command = None
+        with self._writing():
+            self.undo_stack.clear()
+            self.redo_stack.clear()
     
     def get_history_size(self) -> Tuple[int, int]:
         """Get size of undo and redo stacks"""
-        return len(self.undo_stack), len(self.redo_stack)
\ No newline at end of file
+        return self._read(lambda: (len(self.undo_stack), len(self.redo_stack)))
\ No newline at end of file